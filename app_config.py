@@ -1,5 +1,7 @@
 # lossless_video_cutter/app_config.py
-from typing import Dict, List, Tuple
+import re
+import types
+from typing import Dict, FrozenSet, List, Mapping, Tuple
 
 # Supported input file extensions and Qt Dialog filter string
 SUPPORTED_INPUT_FORMATS_FILTER: str = \
@@ -7,47 +9,55 @@ SUPPORTED_INPUT_FORMATS_FILTER: str = \
 SUPPORTED_INPUT_EXTENSIONS: Tuple[str, ...] = (
     '.avi', '.mpg', '.mp4', '.mkv', '.flv', '.3gp', '.webm', '.wmv'
 )
+# O(1) membership tests (e.g. drag-and-drop of many files); the tuple above keeps the display order
+SUPPORTED_INPUT_EXTENSIONS_SET: FrozenSet[str] = frozenset(SUPPORTED_INPUT_EXTENSIONS)
 
 # Output format options
 # Each key is the display name in the dropdown
 # Value is a dict with:
 #   'ext': default extension
-#   'ffmpeg_args': list of ffmpeg arguments (excluding input/output files, -ss, -to)
+#   'ffmpeg_args': tuple of ffmpeg output arguments (excluding input/output files, -ss, -to).
+#                  Cut commands must be built with ffmpeg_utils.build_cut_command, which puts
+#                  -ss/-to before -i (input seeking) instead of decoding from the start of the file.
 #   'is_audio_only': boolean
 #   'is_gif': boolean
 #   'needs_reencode': boolean (True if not -c copy)
-OUTPUT_FORMATS: Dict[str, Dict] = {
+#   'hw_h264': optional boolean; True if the libx264 video encoding may be swapped for a hardware
+#              H.264 encoder (see HW_H264_ENCODERS and ffmpeg_utils.hw_format_args)
+_OUTPUT_FORMATS: Dict[str, Dict] = {
     "Original Format (Lossless)": {
         "ext": None,  # Will use original extension
-        "ffmpeg_args": ["-c", "copy", "-map", "0"],
+        "ffmpeg_args": ("-c", "copy", "-map", "0"),
         "is_audio_only": False,
         "is_gif": False,
         "needs_reencode": False,
     },
     "MP4 (H.264 + AAC)": {
         "ext": ".mp4",
-        "ffmpeg_args": ["-c:v", "libx264", "-preset", "medium", "-crf", "23", "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"],
+        "ffmpeg_args": ("-c:v", "libx264", "-preset", "medium", "-crf", "23", "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"),
         "is_audio_only": False,
         "is_gif": False,
         "needs_reencode": True,
+        "hw_h264": True,
     },
     "MKV (H.264 + AAC)": {
         "ext": ".mkv",
-        "ffmpeg_args": ["-c:v", "libx264", "-preset", "medium", "-crf", "23", "-c:a", "aac", "-b:a", "128k"],
+        "ffmpeg_args": ("-c:v", "libx264", "-preset", "medium", "-crf", "23", "-c:a", "aac", "-b:a", "128k"),
         "is_audio_only": False,
         "is_gif": False,
         "needs_reencode": True,
+        "hw_h264": True,
     },
     "AVI (Xvid + MP3)": {
         "ext": ".avi",
-        "ffmpeg_args": ["-c:v", "libxvid", "-qscale:v", "4", "-c:a", "libmp3lame", "-qscale:a", "4"],
+        "ffmpeg_args": ("-c:v", "libxvid", "-qscale:v", "4", "-c:a", "libmp3lame", "-qscale:a", "4"),
         "is_audio_only": False,
         "is_gif": False,
         "needs_reencode": True,
     },
     "MP3 (Audio Only)": {
         "ext": ".mp3",
-        "ffmpeg_args": ["-vn", "-c:a", "libmp3lame", "-qscale:a", "2", "-ar", "44100", "-ac", "2"],
+        "ffmpeg_args": ("-vn", "-c:a", "libmp3lame", "-qscale:a", "2", "-ar", "44100", "-ac", "2"),
         "is_audio_only": True,
         "is_gif": False,
         "needs_reencode": True, # Technically audio re-encode
@@ -56,12 +66,29 @@ OUTPUT_FORMATS: Dict[str, Dict] = {
         "ext": ".gif",
         # Basic GIF, quality can be improved with palettegen/paletteuse, but complex for multiple segments
         # For simplicity, a direct conversion. Users might want to adjust fps/scale.
-        "ffmpeg_args": ["-vf", "fps=10,scale=480:-1:flags=lanczos", "-loop", "0"],
+        "ffmpeg_args": ("-vf", "fps=10,scale=480:-1:flags=lanczos", "-loop", "0"),
         "is_audio_only": False, # GIF has no audio
         "is_gif": True,
         "needs_reencode": True,
     }
 }
+# Read-only view so callers can't accidentally mutate the shared format table
+OUTPUT_FORMATS: Mapping[str, Dict] = types.MappingProxyType(_OUTPUT_FORMATS)
+
+# Containers whose files can be joined by plain byte concatenation (ffmpeg's concat: protocol), so
+# stream-copied segments in them skip the concat demuxer and its list file
+CONCAT_PROTOCOL_EXTENSIONS: FrozenSet[str] = frozenset({'.ts', '.mts', '.m2ts', '.mpg', '.mpeg'})
+
+# Hardware H.264 encoders in order of preference, with the video args replacing libx264's -c:v/-preset/-crf
+# (roughly equivalent quality). VAAPI is left out: it needs a device and an hwupload filter chain.
+HW_H264_ENCODERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("h264_nvenc", ("-c:v", "h264_nvenc", "-preset", "p4", "-cq", "23")),
+    ("h264_videotoolbox", ("-c:v", "h264_videotoolbox", "-q:v", "65")),
+    ("h264_qsv", ("-c:v", "h264_qsv", "-global_quality", "23")),
+    ("h264_amf", ("-c:v", "h264_amf", "-rc", "cqp", "-qp_i", "23", "-qp_p", "23")),
+)
+# Hardware encodes allowed at once; consumer GPUs cap concurrent encoder sessions (NVENC: 3-8)
+HW_ENCODE_MAX_SESSIONS: int = 2
 
 # Timeline settings
 TIMELINE_SECONDS_PER_TICK_MAJOR: int = 10  # A major tick every 10 seconds
@@ -77,10 +104,18 @@ TIMELINE_PLAYHEAD_COLOR: str = "#E74C3C" # Red
 SETTING_LAST_INPUT_DIR: str = "last_input_dir"
 SETTING_LAST_OUTPUT_DIR: str = "last_output_dir"
 SETTING_LAST_OUTPUT_FORMAT: str = "last_output_format"
+SETTING_FFMPEG_TOOLS_FINGERPRINT: str = "ffmpeg_tools_fingerprint" # Fingerprint of the last verified ffmpeg/ffprobe setup
+
+# On-disk cache of ffprobe results (info, duration, fps, keyframes), stored in the app data directory
+METADATA_CACHE_DB_NAME: str = "metadata_cache.sqlite3"
+METADATA_CACHE_MAX_ENTRIES: int = 1000 # Least recently opened videos are evicted beyond this
+METADATA_CACHE_MAX_BYTES: int = 500 * 1024 * 1024 # ...or once their payloads add up to more than this
 
-# FFmpeg progress regex (example, might need refinement)
-# time=00:00:01.23
-FFMPEG_TIME_REGEX = r"time=(\d{2}:\d{2}:\d{2}\.\d{2,})"
+# FFmpeg progress regex, e.g. time=00:00:01.23
+# Compiled once at import; progress lines are matched at ffmpeg's output rate
+FFMPEG_TIME_RE = re.compile(r"time=(\d\d:\d\d:\d\d\.\d+)")
+# ffmpeg stats lines start with "frame=" (video) or "size=" (audio only)
+FFMPEG_PROGRESS_LINE_PREFIXES: Tuple[str, ...] = ("frame=", "size=")
 
 # Temporary directory name for concat operations
 TEMP_DIR_NAME = "lossless_cutter_temp"
\ No newline at end of file
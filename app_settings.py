@@ -1,36 +1,126 @@
 # lossless_video_cutter/app_settings.py
-from PyQt6.QtCore import QSettings, QStandardPaths
-import os
+from PyQt6.QtCore import (
+    QSettings, QStandardPaths, QThread, QMutex, QMutexLocker, QWaitCondition,
+    QCoreApplication, QObject
+)
+from typing import Dict, Optional
 
 from app_config import (
     SETTING_LAST_INPUT_DIR,
     SETTING_LAST_OUTPUT_DIR,
-    SETTING_LAST_OUTPUT_FORMAT
+    SETTING_LAST_OUTPUT_FORMAT,
+    SETTING_FFMPEG_TOOLS_FINGERPRINT
 )
 
+
+class _SettingsWriter(QThread):
+    """Owns a QSettings instance and persists queued writes off the UI thread, batching them."""
+    BATCH_WINDOW_MS = 200
+
+    def __init__(self, organization_name: str, application_name: str, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._organization_name = organization_name
+        self._application_name = application_name
+        self._mutex = QMutex()
+        self._wake = QWaitCondition()
+        self._pending: Dict[str, str] = {} # Latest value per key; older queued values are superseded
+        self._stopping = False
+
+    def enqueue(self, key: str, value: str) -> None:
+        with QMutexLocker(self._mutex):
+            self._pending[key] = value
+            self._wake.wakeOne()
+
+    def stop(self) -> None:
+        """Flushes any pending writes and joins the thread."""
+        with QMutexLocker(self._mutex):
+            self._stopping = True
+            self._wake.wakeOne()
+        self.wait()
+
+    def run(self):
+        settings = QSettings(self._organization_name, self._application_name)
+        while True:
+            with QMutexLocker(self._mutex):
+                while not self._pending and not self._stopping:
+                    self._wake.wait(self._mutex)
+                stopping = self._stopping
+
+            if not stopping:
+                self.msleep(self.BATCH_WINDOW_MS) # Let writes arriving within the window join this batch
+
+            with QMutexLocker(self._mutex):
+                batch = self._pending
+                self._pending = {}
+
+            for key, value in batch.items():
+                settings.setValue(key, value)
+            if batch:
+                settings.sync()
+
+            if stopping:
+                return
+
+
 class AppSettings:
     def __init__(self, organization_name: str = "MyCompany", application_name: str = "LosslessVideoCutter"):
         self.settings = QSettings(organization_name, application_name)
+        # In-memory copy of values already read/written, so repeated getters don't hit the registry/INI
+        self._cache: Dict[str, str] = {}
+        self._cache_mutex = QMutex()
+
+        self._writer = _SettingsWriter(organization_name, application_name)
+        self._writer.start()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def _get_value(self, key: str, default: str) -> str:
+        with QMutexLocker(self._cache_mutex):
+            if key not in self._cache:
+                self._cache[key] = self.settings.value(key, default, type=str)
+            return self._cache[key]
+
+    def _set_value(self, key: str, value: str) -> None:
+        with QMutexLocker(self._cache_mutex):
+            if self._cache.get(key) == value:
+                return # Nothing changed, skip the write
+            self._cache[key] = value
+        if self._writer.isRunning():
+            self._writer.enqueue(key, value)
+        else: # Writer already flushed on shutdown; fall back to a direct write
+            self.settings.setValue(key, value)
+
+    def flush(self) -> None:
+        """Writes out pending changes and stops the background writer. Called on application shutdown."""
+        if self._writer.isRunning():
+            self._writer.stop()
 
     def get_last_input_dir(self) -> str:
         default_dir = QStandardPaths.standardLocations(QStandardPaths.StandardLocation.MoviesLocation)[0]
-        return self.settings.value(SETTING_LAST_INPUT_DIR, default_dir, type=str)
+        return self._get_value(SETTING_LAST_INPUT_DIR, default_dir)
 
     def set_last_input_dir(self, directory: str) -> None:
-        self.settings.setValue(SETTING_LAST_INPUT_DIR, directory)
+        self._set_value(SETTING_LAST_INPUT_DIR, directory)
 
     def get_last_output_dir(self) -> str:
         default_dir = QStandardPaths.standardLocations(QStandardPaths.StandardLocation.MoviesLocation)[0]
-        return self.settings.value(SETTING_LAST_OUTPUT_DIR, default_dir, type=str)
+        return self._get_value(SETTING_LAST_OUTPUT_DIR, default_dir)
 
     def set_last_output_dir(self, directory: str) -> None:
-        self.settings.setValue(SETTING_LAST_OUTPUT_DIR, directory)
+        self._set_value(SETTING_LAST_OUTPUT_DIR, directory)
 
     def get_last_output_format(self) -> str:
         # Default to the first key in OUTPUT_FORMATS
         from app_config import OUTPUT_FORMATS
         default_format = list(OUTPUT_FORMATS.keys())[0]
-        return self.settings.value(SETTING_LAST_OUTPUT_FORMAT, default_format, type=str)
+        return self._get_value(SETTING_LAST_OUTPUT_FORMAT, default_format)
 
     def set_last_output_format(self, format_name: str) -> None:
-        self.settings.setValue(SETTING_LAST_OUTPUT_FORMAT, format_name)
\ No newline at end of file
+        self._set_value(SETTING_LAST_OUTPUT_FORMAT, format_name)
+
+    def get_ffmpeg_tools_fingerprint(self) -> str:
+        return self._get_value(SETTING_FFMPEG_TOOLS_FINGERPRINT, "")
+
+    def set_ffmpeg_tools_fingerprint(self, fingerprint: str) -> None:
+        self._set_value(SETTING_FFMPEG_TOOLS_FINGERPRINT, fingerprint)
@@ -1,22 +1,77 @@
 # lossless_video_cutter/ffmpeg_utils.py
 import subprocess
 import json
+import math
 import os
 import re
-from typing import List, Optional, Tuple, Dict, Any
-from app_config import FFMPEG_TIME_REGEX # Make sure app_config.py is accessible
+import codecs
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import selectors
+import shutil
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple, Dict, Any, Deque, NamedTuple, Union, Callable, Iterator, Iterable
+try: # Optional faster JSON parser for large ffprobe outputs; stdlib json otherwise
+    import orjson as _json_impl
+except ImportError:
+    _json_impl = json
+_loads = _json_impl.loads # Both accept bytes; orjson.JSONDecodeError subclasses json.JSONDecodeError
 
+from app_config import FFMPEG_TIME_RE, FFMPEG_PROGRESS_LINE_PREFIXES, OUTPUT_FORMATS, HW_H264_ENCODERS # Make sure app_config.py is accessible
+
+# Paths may arrive as str or pathlib.Path; they are normalized with os.fspath once at each entry point
+StrPath = Union[str, "os.PathLike"]
+
+@functools.lru_cache(maxsize=1)
 def check_ffmpeg_tools() -> bool:
-    """Checks if ffmpeg and ffprobe are accessible."""
+    """Checks if ffmpeg and ffprobe are on PATH. Only scans PATH once per process; nothing is spawned."""
+    return bool(shutil.which("ffmpeg")) and bool(shutil.which("ffprobe"))
+
+@functools.lru_cache(maxsize=1)
+def verify_ffmpeg_versions() -> bool:
+    """Checks that ffmpeg and ffprobe actually run by spawning them with -version. Result is cached."""
     try:
-        # Use startupinfo to hide console window on Windows
-        si = get_startup_info()
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, startupinfo=si, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0)
-        subprocess.run(["ffprobe", "-version"], capture_output=True, check=True, startupinfo=si, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0)
+        # _SPAWN_KW hides the console window on Windows
+        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, **_SPAWN_KW)
+        subprocess.run(["ffprobe", "-version"], capture_output=True, check=True, **_SPAWN_KW)
         return True
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
 
+def ffmpeg_tools_fingerprint() -> Optional[str]:
+    """
+    Identifies the current ffmpeg/ffprobe setup (PATH plus resolved binaries and their mtimes), so a
+    successful verify_ffmpeg_versions can be remembered across launches. None if a tool is missing.
+    """
+    parts = [os.environ.get("PATH", "")]
+    for tool in ("ffmpeg", "ffprobe"):
+        tool_path = shutil.which(tool)
+        if not tool_path:
+            return None
+        try:
+            parts.append(f"{tool_path}:{os.stat(tool_path).st_mtime_ns}")
+        except OSError:
+            return None
+    return hashlib.sha1("\0".join(parts).encode("utf-8", "surrogateescape")).hexdigest()
+
+def check_ffmpeg_tools_verified(known_fingerprint: str = "") -> Optional[str]:
+    """
+    Checks that ffmpeg and ffprobe are on PATH and run. Spawning them is skipped when the setup still
+    matches known_fingerprint. Returns the current fingerprint on success, None if the tools are unusable.
+    """
+    if not check_ffmpeg_tools():
+        return None
+    fingerprint = ffmpeg_tools_fingerprint()
+    if fingerprint is None:
+        return None
+    if fingerprint == known_fingerprint or verify_ffmpeg_versions():
+        return fingerprint
+    return None
+
 def get_startup_info():
     """Returns startupinfo for subprocess to prevent console window on Windows."""
     if os.name == 'nt':
@@ -26,9 +81,15 @@ def get_startup_info():
         return startupinfo
     return None
 
-def get_video_info(filepath: str) -> Optional[Dict[str, Any]]:
-    """Gets video duration and other stream info using ffprobe."""
-    command = [
+# Spawn options shared by every ffmpeg/ffprobe call, computed once at import
+_SPAWN_KW: Dict[str, Any] = {
+    "startupinfo": get_startup_info(),
+    "creationflags": subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+}
+
+def _video_info_command(filepath: StrPath) -> List[str]:
+    filepath = os.fspath(filepath)
+    return [
         "ffprobe",
         "-v", "quiet",
         "-print_format", "json",
@@ -36,215 +97,690 @@ def get_video_info(filepath: str) -> Optional[Dict[str, Any]]:
         "-show_streams",
         filepath
     ]
+
+def get_video_info(filepath: StrPath) -> Optional[Dict[str, Any]]:
+    """Gets video duration and other stream info using ffprobe."""
+    command = _video_info_command(filepath)
     try:
-        si = get_startup_info()
-        process = subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=si, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0)
-        return json.loads(process.stdout)
+        process = subprocess.run(command, capture_output=True, check=True, **_SPAWN_KW) # Raw bytes; json.loads decodes them itself
+        return _loads(process.stdout)
     except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error probing video info for '{filepath}': {e}")
         return None
 
-def get_video_duration(video_info: Dict[str, Any]) -> float:
-    """Extracts duration from ffprobe output. More robust parsing."""
-    duration = 0.0
+
+class KeyframeProbeError(Exception):
+    """A keyframe probe failed, so its list is incomplete. keyframes holds what was found anyway (sorted)."""
+    def __init__(self, message: str, keyframes: Iterable[float] = ()):
+        super().__init__(message)
+        self.keyframes: List[float] = sorted(keyframes)
+
+
+class VideoSummary(NamedTuple):
+    """The commonly needed fields of an ffprobe result."""
+    duration: float
+    fps: float
+    width: int
+    height: int
+
+
+def _parse_frame_rate(rate_str: Optional[str], field_name: str) -> float:
+    """Parses an ffprobe 'num/den' rate string. Returns 0.0 if missing or invalid."""
+    if rate_str and rate_str != "0/0":
+        try:
+            num, den = map(int, rate_str.split('/'))
+            if den != 0:
+                return float(num) / den
+        except ValueError:
+            print(f"Warning: Could not parse {field_name}: {rate_str}")
+    return 0.0
+
+
+def probe_summary(video_info: Dict[str, Any]) -> VideoSummary:
+    """
+    Extracts duration, FPS and dimensions from ffprobe output in a single pass over the streams.
+    Duration comes from the format section, falling back to the longest stream.
+    FPS comes from the first video stream ('avg_frame_rate', then 'r_frame_rate'),
+    dimensions from the first video stream that reports them.
+    """
+    format_duration = 0.0
     if video_info and "format" in video_info and "duration" in video_info["format"]:
         try:
             duration_str = video_info["format"]["duration"]
             if duration_str and duration_str != "N/A":
-                duration = float(duration_str)
+                format_duration = float(duration_str)
         except (ValueError, TypeError):
             print(f"Warning: Could not parse format duration: {video_info['format'].get('duration')}")
-            duration = 0.0 # Reset if parsing failed
+            format_duration = 0.0 # Reset if parsing failed
 
-    # Fallback or primary if format duration is 0 or invalid
-    if duration <= 0 and video_info and "streams" in video_info:
-        max_stream_duration = 0.0
-        for stream in video_info["streams"]:
-            if "duration" in stream:
-                try:
-                    stream_dur_str = stream["duration"]
-                    if stream_dur_str and stream_dur_str != "N/A":
-                        stream_dur = float(stream_dur_str)
-                        if stream_dur > max_stream_duration:
-                            max_stream_duration = stream_dur
-                except (ValueError, TypeError):
-                    continue
-        if max_stream_duration > 0:
-            return max_stream_duration
-            
-    return duration if duration > 0 else 0.0
+    max_stream_duration = 0.0
+    fps: Optional[float] = None # None until the first video stream is seen
+    width = height = 0
+    for stream in (video_info or {}).get("streams", []):
+        stream_dur_str = stream.get("duration")
+        if stream_dur_str and stream_dur_str != "N/A":
+            try:
+                stream_dur = float(stream_dur_str)
+                if stream_dur > max_stream_duration:
+                    max_stream_duration = stream_dur
+            except (ValueError, TypeError):
+                pass
+
+        if stream.get("codec_type") != "video":
+            continue
+        if fps is None:
+            fps = _parse_frame_rate(stream.get("avg_frame_rate"), "avg_frame_rate") or \
+                  _parse_frame_rate(stream.get("r_frame_rate"), "r_frame_rate")
+            if fps <= 0:
+                print(f"Warning: FPS not found for video stream in {stream.get('index', 'N/A')}")
+        if width <= 0 or height <= 0:
+            width = int(stream.get("width", 0))
+            height = int(stream.get("height", 0))
+
+    if fps is None:
+        print("Warning: No video stream found or FPS could not be determined.")
+        fps = 0.0
+
+    duration = format_duration if format_duration > 0 else max_stream_duration
+    if width <= 0 or height <= 0:
+        width = height = 0
+    return VideoSummary(duration, fps, width, height)
+
+
+def get_video_duration(video_info: Dict[str, Any]) -> float:
+    """Extracts duration from ffprobe output. Thin wrapper around probe_summary."""
+    return probe_summary(video_info).duration
 
 
 def get_video_fps(video_info: Dict[str, Any]) -> float:
-    """
-    Extracts FPS (Frames Per Second) from ffprobe output for the first video stream.
-    Tries 'avg_frame_rate' first, then 'r_frame_rate'.
-    """
-    if video_info and "streams" in video_info:
-        for stream in video_info["streams"]:
-            if stream.get("codec_type") == "video":
-                # Try avg_frame_rate
-                avg_frame_rate_str = stream.get("avg_frame_rate")
-                if avg_frame_rate_str and avg_frame_rate_str != "0/0":
-                    try:
-                        num, den = map(int, avg_frame_rate_str.split('/'))
-                        if den != 0:
-                            return float(num) / den
-                    except ValueError:
-                        print(f"Warning: Could not parse avg_frame_rate: {avg_frame_rate_str}")
-                        pass # Invalid format, try next
-
-                # Fallback to r_frame_rate
-                r_frame_rate_str = stream.get("r_frame_rate")
-                if r_frame_rate_str and r_frame_rate_str != "0/0":
-                    try:
-                        num, den = map(int, r_frame_rate_str.split('/'))
-                        if den != 0:
-                            return float(num) / den
-                    except ValueError:
-                        print(f"Warning: Could not parse r_frame_rate: {r_frame_rate_str}")
-                        pass # Invalid format
-                
-                # If neither worked but we are in a video stream, break (or log warning)
-                print(f"Warning: FPS not found for video stream in {stream.get('index', 'N/A')}")
-                return 0.0 # Indicate FPS not found for this stream
-    print("Warning: No video stream found or FPS could not be determined.")
-    return 0.0 # Default or if not found
+    """Extracts FPS for the first video stream. Thin wrapper around probe_summary."""
+    return probe_summary(video_info).fps
 
 
 def get_video_dimensions(video_info: Dict[str, Any]) -> Tuple[int, int]:
-    """Extracts width and height from ffprobe output for the first video stream."""
-    if video_info and "streams" in video_info:
-        for stream in video_info["streams"]:
-            if stream.get("codec_type") == "video":
-                width = int(stream.get("width", 0))
-                height = int(stream.get("height", 0))
-                if width > 0 and height > 0:
-                    return width, height
-    return 0, 0
-
-
-def get_keyframes(filepath: str) -> List[float]:
-    """Gets keyframe timestamps using ffprobe."""
+    """Extracts width and height for the first video stream. Thin wrapper around probe_summary."""
+    summary = probe_summary(video_info)
+    return summary.width, summary.height
+
+
+def get_keyframes(filepath: StrPath, start: Optional[float] = None, duration: Optional[float] = None) -> List[float]:
+    """
+    Gets keyframe timestamps using ffprobe.
+    Reads packet flags instead of decoding frames, so no video decoding is needed.
+    If start and/or duration are given, only that part of the file is read (-read_intervals);
+    duration=None reads to the end of the file.
+    """
+    filepath = os.fspath(filepath)
     command = [
         "ffprobe",
         "-v", "error",
-        "-skip_frame", "nokey", # This selects only keyframes
         "-select_streams", "v:0", # Only from the first video stream
-        "-show_entries", "frame=pkt_pts_time", # Get presentation timestamp
-        "-of", "csv=p=0", # Output as CSV, no header
-        filepath
+        "-show_entries", "packet=pts_time,flags", # Keyframe packets carry a 'K' flag
+        "-of", "json",
     ]
-    keyframes = []
+    if start is not None or duration is not None:
+        interval = f"{start or 0}%"
+        if duration is not None:
+            interval += f"+{duration}"
+        command.extend(["-read_intervals", interval])
+    command.append(filepath)
     try:
-        si = get_startup_info()
-        process = subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=si, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0)
-        raw_output = process.stdout.strip()
-        if raw_output: # Ensure there's output before splitting
-            for line in raw_output.split('\n'):
-                if line: # Ensure line is not empty
-                    try:
-                        keyframes.append(float(line))
-                    except ValueError:
-                        print(f"Warning: Could not parse keyframe time: {line}")
-        return sorted(list(set(keyframes))) # Ensure sorted and unique
+        process = subprocess.run(command, capture_output=True, check=True, **_SPAWN_KW) # Raw bytes; json.loads decodes them itself
+        data = _loads(process.stdout) if process.stdout.strip() else {}
+        keyframes = set()
+        for packet in data.get("packets", []):
+            pts_time = packet.get("pts_time")
+            if "K" in packet.get("flags", "") and pts_time not in (None, "N/A"):
+                try:
+                    keyframes.add(float(pts_time))
+                except ValueError:
+                    print(f"Warning: Could not parse keyframe time: {pts_time}")
+        return sorted(keyframes) # Ensure sorted and unique
     except subprocess.CalledProcessError as e:
-        # If ffprobe fails (e.g., corrupted file, or no keyframes if skip_frame is too strict for some formats)
+        # If ffprobe fails (e.g., corrupted file)
         print(f"Error getting keyframes (ffprobe failed for '{filepath}'): {e}")
-        print(f"ffprobe stderr: {e.stderr.decode() if e.stderr else 'N/A'}")
+        print(f"ffprobe stderr: {e.stderr.decode(errors='replace') if e.stderr else 'N/A'}")
         return []
     except FileNotFoundError:
         print(f"Error getting keyframes: ffprobe not found.")
         return []
+    except json.JSONDecodeError as e:
+        print(f"Error getting keyframes: could not parse ffprobe output for '{filepath}': {e}")
+        return []
     except Exception as e:
         print(f"Unexpected error getting keyframes for '{filepath}': {e}")
         return []
 
 
+def get_video_info_and_keyframes(filepath: StrPath, read_duration: Optional[float] = None
+                                 ) -> Tuple[Optional[Dict[str, Any]], List[float]]:
+    """
+    Format/stream info (as get_video_info) and the keyframes of the first video stream from a single
+    ffprobe run. read_duration limits the packets read to the first read_duration seconds of the file;
+    the info always covers the whole file. Returns (None, []) if probing fails.
+    """
+    filepath = os.fspath(filepath)
+    command = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        # Packets of all streams are listed (-select_streams would also drop the other streams' info)
+        "-show_entries", "packet=stream_index,pts_time,flags",
+    ]
+    if read_duration is not None:
+        command.extend(["-read_intervals", f"%+{read_duration}"])
+    command.append(filepath)
+    try:
+        process = subprocess.run(command, capture_output=True, check=True, **_SPAWN_KW)
+        data = _loads(process.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error probing video info for '{filepath}': {e}")
+        return None, []
+
+    packets = data.pop("packets", [])
+    video_index = next((s.get("index") for s in data.get("streams", []) if s.get("codec_type") == "video"), None)
+    keyframes = set()
+    for packet in packets:
+        pts_time = packet.get("pts_time")
+        if packet.get("stream_index") != video_index or "K" not in packet.get("flags", "") or pts_time in (None, "N/A"):
+            continue
+        try:
+            keyframes.add(float(pts_time))
+        except ValueError:
+            print(f"Warning: Could not parse keyframe time: {pts_time}")
+    return data, sorted(keyframes)
+
+
+def iter_keyframes(filepath: StrPath, start: Optional[float] = None, duration: Optional[float] = None) -> Iterator[float]:
+    """
+    Like get_keyframes, but yields keyframe timestamps as ffprobe prints them instead of waiting
+    for the whole packet list. Output comes in ffprobe's order (not deduplicated).
+    Raises KeyframeProbeError if ffprobe can't be run or fails, so a failed probe isn't taken for an empty one.
+    """
+    filepath = os.fspath(filepath)
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "compact=p=0", # One "pts_time=...|flags=..." line per packet
+    ]
+    if start is not None or duration is not None:
+        interval = f"{start or 0}%"
+        if duration is not None:
+            interval += f"+{duration}"
+        command.extend(["-read_intervals", interval])
+    command.append(filepath)
+    try:
+        # stderr only carries -v error messages, small enough to read once stdout is done
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, bufsize=1, **_SPAWN_KW)
+    except FileNotFoundError:
+        raise KeyframeProbeError("ffprobe not found.")
+    try:
+        for line in process.stdout:
+            pts_field, _, flags_field = line.rstrip().partition("|")
+            if "K" not in flags_field or not pts_field.startswith("pts_time="):
+                continue
+            try:
+                yield float(pts_field[9:]) # len("pts_time=")
+            except ValueError: # "N/A"
+                continue
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise KeyframeProbeError(f"ffprobe exited with code {process.returncode} for '{filepath}': "
+                                     f"{stderr.strip() or 'no error output'}")
+    finally:
+        if process.poll() is None: # Consumer stopped early
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+
+
+_KEYFRAME_PROBE_MIN_SLICE_SEC = 60.0 # Shorter slices aren't worth an extra ffprobe process
+KEYFRAME_HEAD_PROBE_SEC = _KEYFRAME_PROBE_MIN_SLICE_SEC # Keyframes read along with the info probe
+KEYFRAME_PROBE_MAX_SLICE_SEC = 600.0
+KEYFRAME_BATCH_SIZE = 256
+KEYFRAME_BATCH_INTERVAL = 0.1 # Seconds; flush a partial batch at least this often
+
+def get_keyframes_parallel(filepath: StrPath, duration: float, max_workers: Optional[int] = None,
+                           batch_callback: Optional[Callable[[List[float]], None]] = None,
+                           start: float = 0.0, known_keyframes: Iterable[float] = ()) -> List[float]:
+    """
+    Gets keyframe timestamps by splitting [start, duration] into equal slices of at most
+    KEYFRAME_PROBE_MAX_SLICE_SEC and running one ffprobe per slice, max_workers at a time. ffprobe seeks to the keyframe at or before each slice start, so the
+    slices overlap slightly; the merged result is deduplicated and sorted.
+    known_keyframes (e.g. from get_video_info_and_keyframes) are included in the result but never
+    reported again.
+    If batch_callback is given, it is called from this thread with each batch of newly found
+    keyframes (unsorted, every KEYFRAME_BATCH_SIZE keyframes or KEYFRAME_BATCH_INTERVAL seconds)
+    while the probes are still running.
+    Raises KeyframeProbeError, carrying the keyframes found, if any slice failed.
+    """
+    filepath = os.fspath(filepath)
+    span = max(0.0, duration - start)
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, int(span // _KEYFRAME_PROBE_MIN_SLICE_SEC)))
+    # Long videos get more slices than workers; they run in order, so the timeline fills in front to back
+    slices = max(workers, math.ceil(span / KEYFRAME_PROBE_MAX_SLICE_SEC))
+    slice_len = span / slices
+
+    results: "queue.Queue[Optional[float]]" = queue.Queue()
+    failures: List[str] = [] # list.append is atomic, so slices record their errors without a lock
+    def probe_slice(index: int) -> None:
+        try:
+            if slices == 1 and start <= 0:
+                timestamps = iter_keyframes(filepath)
+            else: # The last slice reads to the end, in case the reported duration is short
+                timestamps = iter_keyframes(filepath, start + index * slice_len, slice_len if index < slices - 1 else None)
+            for pts in timestamps:
+                results.put(pts)
+        except KeyframeProbeError as e:
+            failures.append(str(e))
+        finally:
+            results.put(None) # This slice is done
+
+    keyframes = set(known_keyframes)
+    batch: List[float] = []
+    last_flush = time.monotonic()
+    # Threads are enough here: each one just waits on its own ffprobe process
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(slices):
+            pool.submit(probe_slice, i)
+        remaining = slices
+        while remaining:
+            try:
+                pts = results.get(timeout=KEYFRAME_BATCH_INTERVAL)
+                if pts is None:
+                    remaining -= 1
+                elif pts not in keyframes:
+                    keyframes.add(pts)
+                    batch.append(pts)
+            except queue.Empty:
+                pass # Fall through so a slow trickle still gets flushed on time
+            if batch_callback is not None and batch and (
+                    len(batch) >= KEYFRAME_BATCH_SIZE or time.monotonic() - last_flush >= KEYFRAME_BATCH_INTERVAL):
+                batch_callback(batch)
+                batch = []
+                last_flush = time.monotonic()
+    if batch_callback is not None and batch:
+        batch_callback(batch)
+    if failures:
+        raise KeyframeProbeError(f"{len(failures)} of {slices} keyframe probes failed: {failures[0]}", keyframes)
+    return sorted(keyframes)
+
+
+@functools.lru_cache(maxsize=1)
+def hw_h264_encoder_args() -> Optional[Tuple[str, ...]]:
+    """
+    Video args of the first HW_H264_ENCODERS entry this ffmpeg build lists, or None. Being listed doesn't
+    mean the hardware is present, so callers fall back to software encoding if it fails.
+    """
+    try:
+        process = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True,
+                                 timeout=10, **_SPAWN_KW)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    listed = {fields[1] for fields in map(str.split, process.stdout.splitlines()) if len(fields) > 1}
+    return next((args for name, args in HW_H264_ENCODERS if name in listed), None)
+
+_hw_encoding_failed = False
+# Lowercase fragments of ffmpeg messages that mean the hardware encoder or device could not be set up,
+# as opposed to failures (bad input, full disk, ...) that software encoding would hit as well
+_HW_INIT_ERROR_MARKERS: Tuple[str, ...] = (
+    "error while opening encoder", "could not open encoder", "error initializing output stream",
+    "cannot load", "no capable devices", "no nvenc capable", "openencodesessionex failed",
+    "nvenc api version", "cannot init cuda", "device creation failed", "mfx session",
+    "compression session", "amf failed", "failed to initialise", "failed to initialize",
+)
+_SW_VIDEO_OPTIONS = ("-c:v", "-preset", "-crf") # Each followed by its value
+
+def mark_hw_encoding_failed() -> None:
+    """Disables hardware encoding for the rest of the session (e.g. after the encoder failed to open)."""
+    global _hw_encoding_failed
+    _hw_encoding_failed = True
+
+def is_hw_init_failure(output_lines: Iterable[str]) -> bool:
+    """True if ffmpeg's output shows the hardware encoder or device failing to initialise."""
+    low = "\n".join(output_lines).lower()
+    return any(marker in low for marker in _HW_INIT_ERROR_MARKERS)
+
+def hw_format_args(output_format_key: str) -> Optional[Tuple[str, ...]]:
+    """The format's ffmpeg_args with libx264 swapped for the hardware encoder, or None if that doesn't apply."""
+    if _hw_encoding_failed or not OUTPUT_FORMATS[output_format_key].get("hw_h264"):
+        return None
+    encoder_args = hw_h264_encoder_args()
+    if encoder_args is None:
+        return None
+    args = OUTPUT_FORMATS[output_format_key]["ffmpeg_args"]
+    kept: List[str] = []
+    i = 0
+    while i < len(args):
+        if args[i] in _SW_VIDEO_OPTIONS:
+            i += 2
+            continue
+        kept.append(args[i])
+        i += 1
+    return (*encoder_args, *kept)
+
+def _encode_args(output_format_key: str, hw: bool) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(Input options, output args) for the format; with hw, hardware decode and encode where available."""
+    hw_args = hw_format_args(output_format_key) if hw else None
+    if hw_args is None:
+        return (), OUTPUT_FORMATS[output_format_key]["ffmpeg_args"]
+    return ("-hwaccel", "auto"), hw_args
+
+def build_cut_command(input_path: StrPath, output_path: StrPath, start_time: Optional[float],
+                      end_time: Optional[float], output_format_key: str, hw: bool = False) -> List[str]:
+    """
+    Builds the ffmpeg command that cuts [start_time, end_time] of input_path into output_path.
+    -ss/-to are placed before -i (input seeking) so ffmpeg jumps through the container index
+    instead of decoding everything up to the start point. hw selects hardware encoding (hw_format_args).
+    """
+    input_opts, format_args = _encode_args(output_format_key, hw)
+    seek_args: List[str] = []
+    if start_time is not None: seek_args += ["-ss", str(start_time)]
+    if end_time is not None: seek_args += ["-to", str(end_time)]
+    return ["ffmpeg", "-y", *input_opts, *seek_args, "-i", os.fspath(input_path),
+            *format_args, os.fspath(output_path)]
+
+def build_multi_input_cut_command(input_path: StrPath, outputs: List[Tuple[StrPath, float, float]],
+                                  output_format_key: str) -> List[str]:
+    """
+    Builds one ffmpeg command that writes every (output_path, start_time, end_time) cut of input_path.
+    Unlike build_multi_cut_command, the input is opened once per cut with its own -ss/-to before -i
+    (input seeking, as in build_cut_command), so the cuts may be anywhere in the file; only the
+    process startup is shared. Output i maps input i in place of the format's "-map 0".
+    """
+    input_path = os.fspath(input_path)
+    command = ["ffmpeg", "-y"]
+    for _, start_time, end_time in outputs:
+        command += ["-ss", str(start_time), "-to", str(end_time), "-i", input_path]
+    format_args = list(OUTPUT_FORMATS[output_format_key]["ffmpeg_args"])
+    map_idx = format_args.index("-map") if "-map" in format_args else -1
+    for i, (output_path, _, _) in enumerate(outputs):
+        if map_idx >= 0:
+            format_args[map_idx + 1] = str(i)
+            command += format_args
+        else:
+            command += ["-map", str(i), *format_args]
+        command.append(os.fspath(output_path))
+    return command
+
+def build_concat_filter_command(input_path: StrPath, segments: List[Tuple[float, float]], output_path: StrPath,
+                                output_format_key: str, has_audio: bool, hw: bool = False) -> List[str]:
+    """
+    Builds one ffmpeg command that joins the (start_time, end_time) segments of input_path into output_path
+    with the concat filter, encoding the result once. Each segment is its own input with -ss/-to before -i,
+    so only the segments are decoded. Not for formats whose args carry their own filters (GIF).
+    """
+    input_path = os.fspath(input_path)
+    input_opts, format_args = _encode_args(output_format_key, hw)
+    command = ["ffmpeg", "-y"]
+    for start_time, end_time in segments:
+        command += [*input_opts, "-ss", str(start_time), "-to", str(end_time), "-i", input_path]
+    pads = "".join(f"[{i}:v:0][{i}:a:0]" if has_audio else f"[{i}:v:0]" for i in range(len(segments)))
+    if has_audio:
+        graph = f"{pads}concat=n={len(segments)}:v=1:a=1[v][a]"
+        command += ["-filter_complex", graph, "-map", "[v]", "-map", "[a]"]
+    else:
+        graph = f"{pads}concat=n={len(segments)}:v=1:a=0[v]"
+        command += ["-filter_complex", graph, "-map", "[v]"]
+    command += [*format_args, os.fspath(output_path)]
+    return command
+
+def build_multi_cut_command(input_path: StrPath, outputs: List[Tuple[StrPath, float, float]],
+                            output_format_key: str) -> List[str]:
+    """
+    Builds one ffmpeg command that writes every (output_path, start_time, end_time) cut of input_path,
+    reading the input once. Uses output seeking (-ss/-to after -i), so it only suits stream copy of
+    cuts that start on keyframes and together cover most of the file (e.g. splitting at keyframe tags).
+    """
+    command = ["ffmpeg", "-y", "-i", os.fspath(input_path)]
+    format_args = OUTPUT_FORMATS[output_format_key]["ffmpeg_args"]
+    for output_path, start_time, end_time in outputs:
+        command += ["-ss", str(start_time), "-to", str(end_time), *format_args,
+                    "-avoid_negative_ts", "make_zero", os.fspath(output_path)]
+    return command
+
+
+_TIME_RE = re.compile(r"^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)$")
+
 def time_str_to_seconds(time_str: str) -> float:
     """Converts HH:MM:SS.ms, MM:SS.ms, or SS.ms string to seconds."""
     if not isinstance(time_str, str): return 0.0
-    parts = time_str.split(':')
-    try:
-        if len(parts) == 3: # HH:MM:SS.ms
-            h = int(parts[0])
-            m = int(parts[1])
-            s_ms = float(parts[2])
-            return float(h * 3600 + m * 60 + s_ms)
-        elif len(parts) == 2: # MM:SS.ms
-            m = int(parts[0])
-            s_ms = float(parts[1])
-            return float(m * 60 + s_ms)
-        elif len(parts) == 1: # SS.ms
-            return float(parts[0])
-    except ValueError:
+    # Fast path for ffmpeg's progress format, HH:MM:SS.ms
+    if len(time_str) >= 8 and time_str[2] == ':' and time_str[5] == ':':
+        try:
+            return int(time_str[0:2]) * 3600 + int(time_str[3:5]) * 60 + float(time_str[6:])
+        except ValueError:
+            pass
+    match = _TIME_RE.match(time_str)
+    if not match:
         print(f"Warning: Could not parse time string to seconds: {time_str}")
-    return 0.0
+        return 0.0
+    h, m, s_ms = match.groups()
+    return (int(h) if h else 0) * 3600 + (int(m) if m else 0) * 60 + float(s_ms)
+
+
+_ERR_KEYWORDS: Tuple[str, ...] = ("error", "failed", "invalid")
+
+def _is_error_line(line: str) -> bool:
+    """True if an ffmpeg output line looks like an error. Lowercases the line only once."""
+    low = line.lower()
+    return any(keyword in low for keyword in _ERR_KEYWORDS)
+
+
+class _ReactorStream:
+    __slots__ = ("stream", "on_line", "decoder", "tail")
+
+    def __init__(self, stream, on_line: Callable[[Optional[str]], None]):
+        self.stream = stream
+        self.on_line = on_line
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.tail = ""
+
+
+_LINE_BREAK_RE = re.compile(r"[\r\n]") # ffmpeg ends progress lines with a bare \r
+
+class _OutputReactor:
+    """
+    A single thread that reads the output pipes of all running ffmpeg processes through one selector
+    and hands their stripped, non-empty lines to per-pipe callbacks (None once a pipe reaches EOF).
+    """
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending: List[_ReactorStream] = [] # Registered by the reactor thread itself, never concurrently
+        self._thread: Optional[threading.Thread] = None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+    def add(self, stream, on_line: Callable[[Optional[str]], None]) -> None:
+        """Reads stream (a binary pipe) until EOF, then closes it. on_line is called on the reactor thread."""
+        os.set_blocking(stream.fileno(), False)
+        with self._lock:
+            self._pending.append(_ReactorStream(stream, on_line))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="ffmpeg-output-reactor", daemon=True)
+                self._thread.start()
+        os.write(self._wake_w, b"\0")
+
+    def _loop(self) -> None:
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None: # Wake-up pipe: pick up newly added streams
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    with self._lock:
+                        pending, self._pending = self._pending, []
+                    for entry in pending:
+                        self._selector.register(entry.stream, selectors.EVENT_READ, entry)
+                else:
+                    try:
+                        self._read(key.data)
+                    except Exception: # One broken stream must not take down the others' reader
+                        import traceback
+                        traceback.print_exc()
+                        self._finish(key.data)
+
+    def _read(self, entry: _ReactorStream) -> None:
+        try:
+            chunk = os.read(entry.stream.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+        if chunk:
+            parts = _LINE_BREAK_RE.split(entry.tail + entry.decoder.decode(chunk))
+            entry.tail = parts.pop() # Incomplete last line
+            for part in parts:
+                line = part.strip()
+                if line:
+                    self._deliver(entry, line)
+            return
+        # EOF
+        try:
+            line = (entry.tail + entry.decoder.decode(b"", final=True)).strip()
+            if line:
+                self._deliver(entry, line)
+        finally:
+            self._finish(entry)
+
+    @staticmethod
+    def _deliver(entry: _ReactorStream, line: Optional[str]) -> None:
+        """Calls entry.on_line, logging (not propagating) its errors so the reactor thread keeps running."""
+        try:
+            entry.on_line(line)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+
+    def _finish(self, entry: _ReactorStream) -> None:
+        """Delivers EOF, then unregisters and closes the stream. Safe to call more than once."""
+        if entry.stream.closed:
+            return
+        try:
+            self._deliver(entry, None)
+        finally:
+            try:
+                self._selector.unregister(entry.stream)
+            except (KeyError, ValueError):
+                pass
+            entry.stream.close()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_output_reactor() -> Optional[_OutputReactor]:
+    """The shared reactor, created on first use; None on Windows, where selectors cannot poll pipes."""
+    return None if os.name == 'nt' else _OutputReactor()
 
 
 class FfmpegProcess:
     """
     Manages an ffmpeg subprocess, allowing for progress monitoring and basic error capture.
     """
-    def __init__(self, command: List[str], total_duration: Optional[float] = None):
-        self.command = command
+    PROGRESS_MIN_INTERVAL = 0.1 # Seconds between progress callbacks (~10 Hz)
+    CANCEL_POLL_INTERVAL = 0.05 # Seconds between cancel_event checks while ffmpeg is silent
+
+    def __init__(self, command: List[StrPath], total_duration: Optional[float] = None):
+        # Normalize path-like elements once, so subprocess never has to convert them
+        self.command: List[str] = [os.fspath(arg) if isinstance(arg, os.PathLike) else arg for arg in command]
         self.total_duration = total_duration
         self.process: Optional[subprocess.Popen] = None
         self.error_output: str = ""
-        self.stdout_buffer: List[str] = [] # To capture more output if needed
+        # Ring buffers: keep only the tail of ffmpeg's output and the most recent error-looking lines,
+        # so memory stays bounded no matter how verbose ffmpeg gets.
+        self.stdout_buffer: Deque[str] = collections.deque(maxlen=400)
+        self._error_lines: Deque[str] = collections.deque(maxlen=16)
+        # stop() may be called from another thread, before or while run() starts the process
+        self._stop_lock = threading.Lock()
+        self._stop_requested = False
 
-    def run(self, progress_callback: Optional[callable] = None) -> bool:
+    def stop(self, grace_period: float = 0.5) -> None:
+        """Terminates the ffmpeg process (killing it if it ignores that for grace_period seconds); thread-safe."""
+        with self._stop_lock:
+            self._stop_requested = True
+            process = self.process
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
         try:
-            si = get_startup_info()
-            # For CREATE_NO_WINDOW with Popen, it's slightly different
-            creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-
-            self.process = subprocess.Popen(
-                self.command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, # Redirect stderr to stdout
-                universal_newlines=True,  # text mode
-                startupinfo=si,
-                creationflags=creation_flags,
-                bufsize=1 # Line buffered
-            )
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def terminate(self) -> None:
+        """
+        Asks the ffmpeg process to exit without waiting for it; thread-safe. Escalating to kill is left to
+        run(), which does that itself once its cancel_event is set.
+        """
+        with self._stop_lock:
+            process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def run(self, progress_callback: Optional[callable] = None,
+            cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Runs the command to completion, reporting progress. If cancel_event gets set meanwhile,
+        the process is stopped (see stop()) and False is returned.
+        """
+        try:
+            with self._stop_lock:
+                if self._stop_requested or (cancel_event is not None and cancel_event.is_set()):
+                    self._stop_requested = True
+                    self.error_output = "FFmpeg process was stopped."
+                    return False
+                reactor = _get_output_reactor()
+                # The reactor splits raw bytes into lines itself; the reader thread fallback uses text mode
+                text_kw: Dict[str, Any] = {} if reactor else {"universal_newlines": True, "bufsize": 1}
+                self.process = subprocess.Popen(
+                    self.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, # Redirect stderr to stdout
+                    **text_kw,
+                    **_SPAWN_KW
+                )
 
             self.error_output = "" # Reset error output
-            self.stdout_buffer = []
+            self.stdout_buffer.clear()
+            self._error_lines.clear()
 
             if self.process.stdout:
-                for line in iter(self.process.stdout.readline, ''):
-                    if not line: # Should not happen with iter(readline, '') but good practice
-                        break
-                    line_strip = line.strip()
-                    # print(f"FFMPEG_RAW: {line_strip}") # Verbose Debugging
-                    self.stdout_buffer.append(line_strip) # Store all output for later inspection
-
-                    if progress_callback and self.total_duration and self.total_duration > 0:
-                        match = re.search(FFMPEG_TIME_REGEX, line_strip)
-                        if match:
-                            current_time_str = match.group(1)
-                            current_time_sec = time_str_to_seconds(current_time_str)
-                            percentage = min(100, int((current_time_sec / self.total_duration) * 100))
-                            progress_callback(percentage, f"Encoding... {current_time_str}")
-                self.process.stdout.close()
+                # Output is parsed where it is read: on the shared reactor thread where available, else on a
+                # reader thread for this process. This thread only waits for EOF and watches cancel_event.
+                output_done = threading.Event()
+                on_line = self._make_line_handler(progress_callback, output_done)
+                reader = None
+                if reactor:
+                    reactor.add(self.process.stdout, on_line)
+                else:
+                    reader = threading.Thread(target=self._drain_output, args=(self.process.stdout, on_line), daemon=True)
+                    reader.start()
+                while not output_done.wait(self.CANCEL_POLL_INTERVAL):
+                    if cancel_event is not None and cancel_event.is_set() and not self._stop_requested:
+                        self.stop() # Output keeps draining until EOF
+                if reader is not None:
+                    reader.join()
 
             return_code = self.process.wait() # Wait for the process to complete
 
-            # Combine buffer into error_output string for final message
-            self.error_output = "\n".join(self.stdout_buffer)
-
-
             if return_code == 0:
+                self.error_output = "\n".join(self.stdout_buffer)
                 return True
             else:
                 # Extract a more relevant snippet for the error message
-                error_lines = self.error_output.strip().split('\n')
-                relevant_errors = [l for l in error_lines if "error" in l.lower() or "failed" in l.lower() or "invalid" in l.lower()]
-                if not relevant_errors: # If no specific error lines, take last few
-                    specific_error_snippet = "\n".join(error_lines[-5:])
+                if not self._error_lines: # If no specific error lines, take last few
+                    specific_error_snippet = "\n".join(list(self.stdout_buffer)[-5:])
                 else:
-                    specific_error_snippet = "\n".join(relevant_errors[-3:]) # Last 3 relevant error lines
+                    specific_error_snippet = "\n".join(list(self._error_lines)[-3:]) # Last 3 relevant error lines
 
                 print(f"FFmpeg command failed with exit code {return_code}")
                 print(f"Command: {' '.join(self.command)}")
@@ -265,10 +801,64 @@ class FfmpegProcess:
         finally:
             # Ensure process is cleaned up if it exists
             if self.process and self.process.poll() is None: # Check if still running
-                print("Warning: FFmpeg process did not terminate, attempting to kill.")
-                self.process.kill()
-                self.process.wait() # Wait for kill to complete
+                print("Warning: FFmpeg process did not terminate, attempting to stop it.")
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    try:
+                        self.process.wait(timeout=3) # Don't hang forever on a process stuck in the kernel
+                    except subprocess.TimeoutExpired:
+                        print("Warning: FFmpeg process could not be killed.")
+
+
+    def _make_line_handler(self, progress_callback: Optional[callable],
+                           output_done: threading.Event) -> Callable[[Optional[str]], None]:
+        """
+        Returns the callback that consumes ffmpeg's stripped output lines (None at EOF, which sets output_done):
+        it records them for error reporting and turns time= lines into coalesced progress_callback calls.
+        """
+        report_progress = bool(progress_callback and self.total_duration and self.total_duration > 0)
+        last_callback_time = 0.0
+        last_percentage = -1
 
+        def on_line(line_strip: Optional[str]) -> None:
+            nonlocal last_callback_time, last_percentage
+            if line_strip is None: # EOF
+                output_done.set()
+                return
+            # print(f"FFMPEG_RAW: {line_strip}") # Verbose Debugging
+            self.stdout_buffer.append(line_strip) # Keep the tail of the output for later inspection
+            if _is_error_line(line_strip):
+                self._error_lines.append(line_strip)
+
+            # Cheap prefilters so verbose non-progress lines never reach the regex
+            if not report_progress or not line_strip.startswith(FFMPEG_PROGRESS_LINE_PREFIXES) or "time=" not in line_strip:
+                return
+            match = FFMPEG_TIME_RE.search(line_strip)
+            if match:
+                current_time_str = match.group(1)
+                current_time_sec = time_str_to_seconds(current_time_str)
+                percentage = min(100, int((current_time_sec / self.total_duration) * 100))
+                now = time.monotonic()
+                # Coalesce: only report a changed percentage, at most every PROGRESS_MIN_INTERVAL seconds
+                if percentage != last_percentage and now - last_callback_time > self.PROGRESS_MIN_INTERVAL:
+                    progress_callback(percentage, f"Encoding... {current_time_str}")
+                    last_callback_time = now
+                    last_percentage = percentage
+
+        return on_line
+
+    @staticmethod
+    def _drain_output(stream, on_line: Callable[[Optional[str]], None]) -> None:
+        """Reader thread: passes stripped output lines to on_line, then None once ffmpeg closes its output."""
+        try:
+            for line in iter(stream.readline, ''):
+                on_line(line.strip())
+        finally:
+            stream.close()
+            on_line(None)
 
     def get_error_message(self) -> str:
         return self.error_output
\ No newline at end of file
@@ -1,7 +1,14 @@
 # lossless_video_cutter/main.py
 import sys
 import os
-from typing import List, Tuple, Optional, Dict, Any
+import bisect
+import heapq
+import math
+import itertools
+import time
+import concurrent.futures
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Any, Deque
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -20,15 +27,53 @@ from PyQt6.QtMultimediaWidgets import QVideoWidget
 
 
 from app_config import (
-    SUPPORTED_INPUT_FORMATS_FILTER, SUPPORTED_INPUT_EXTENSIONS,
+    SUPPORTED_INPUT_FORMATS_FILTER, SUPPORTED_INPUT_EXTENSIONS_SET,
     OUTPUT_FORMATS, TIMELINE_HEIGHT
 )
 from app_settings import AppSettings
-from ffmpeg_utils import check_ffmpeg_tools, get_video_dimensions
+from metadata_cache import MetadataCache, metadata_cache_key
+from ffmpeg_utils import check_ffmpeg_tools_verified, probe_summary
 from worker_threads import VideoProberWorker, VideoProcessorWorker
 from ui_timeline import TimelineWidget
 
 
+# Time formatters specialised on whether hours are shown, so per-tick callers skip the branching.
+# Integer-only arithmetic: the current-time one runs on every player position tick.
+def _fmt_ms_ms(time_ms: int) -> str:
+    m, rem = divmod(time_ms, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{m:02}:{s:02}.{ms:03d}"
+
+def _fmt_hms_ms(time_ms: int) -> str:
+    h, rem = divmod(time_ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02}:{m:02}:{s:02}.{ms:03d}"
+
+def _fmt_ms(time_ms: int) -> str:
+    m, s = divmod(time_ms // 1000, 60)
+    return f"{m:02}:{s:02}"
+
+def _fmt_hms(time_ms: int) -> str:
+    h, rem = divmod(time_ms // 1000, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02}:{m:02}:{s:02}"
+
+
+class _Hot:
+    """
+    Player state read or written on every position update and seek. Kept on a small slotted object
+    rather than on the QMainWindow, whose attributes live in an instance __dict__.
+    """
+    __slots__ = ("pending_pos_ms", "has_valid_source", "last_ui_state", "player_is_seeking")
+
+    def __init__(self):
+        self.pending_pos_ms: int = 0 # Latest player position waiting for the next _ui_tick
+        self.has_valid_source: bool = False # Mirrors media_player.source().isValid(); see _set_media_source
+        self.last_ui_state: Optional[Tuple] = None # Inputs of the last update_ui_state run
+        self.player_is_seeking: bool = False
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -37,14 +82,24 @@ class MainWindow(QMainWindow):
         self.setAcceptDrops(True)
 
         self.settings = AppSettings()
+        self.metadata_cache = MetadataCache()
 
         self.current_video_path: Optional[str] = None
+        self._basename: str = "" # Name parts of current_video_path, split once in load_video
+        self._stem: str = ""
+        self._ext: str = ""
         self.video_info: Optional[Dict[str, Any]] = None
         self.video_duration: float = 0.0
         self.video_fps: float = 0.0 
+        self._total_time_str: str = self.format_time_ms(0) # Cached "/ total" part of the time label
+        self._fmt_cur = _fmt_ms_ms # Current-time formatter, picked per video from its duration
         self.keyframes: List[float] = []
         self.selections: List[Tuple[float, float]] = []
+        self._selection_starts: List[float] = [] # Start times of self.selections, same (sorted) order
+        # Running maximum of the selections' end times, same order; lets lookups skip past nested selections
+        self._selection_max_ends: List[float] = []
         self.current_selection_start: Optional[float] = None
+        self._probe_cache_key: Optional[str] = None # Set while a probe whose results should be cached is running
 
         self.prober_worker: Optional[VideoProberWorker] = None
         self.processor_worker: Optional[VideoProcessorWorker] = None
@@ -52,15 +107,28 @@ class MainWindow(QMainWindow):
         self.media_player: Optional[QMediaPlayer] = None
         self.audio_output: Optional[QAudioOutput] = None
         self.video_widget: Optional[QVideoWidget] = None
-        self._player_is_seeking: bool = False
+        self._hot = _Hot() # Flags touched on every position tick / seek
         self._frame_step_buttons_enabled: bool = False
+        # Recent media player errors as (monotonic time, error name, message); dumped with Ctrl+Shift+L
+        self._err_log: Deque[Tuple[float, str, str]] = deque(maxlen=64)
+        self._err_last_ts: float = 0.0 # When an error was last shown in the status bar
+        self._last_progress_pct: int = -1 # Last processing progress shown, see on_processing_progress
+        self._last_progress_ts: float = 0.0
+
+        # Check the ffmpeg tools in the background while the UI is built; the result is awaited below
+        ffcheck_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        ffcheck_future = ffcheck_executor.submit(check_ffmpeg_tools_verified, self.settings.get_ffmpeg_tools_fingerprint())
+        ffcheck_executor.shutdown(wait=False)
 
         self._init_ui()
         self._init_media_player()
         self._connect_signals()
         self.update_ui_state()
 
-        if not check_ffmpeg_tools():
+        ffmpeg_fingerprint = ffcheck_future.result()
+        if ffmpeg_fingerprint:
+            self.settings.set_ffmpeg_tools_fingerprint(ffmpeg_fingerprint) # Next launch can skip spawning them
+        else:
             QMessageBox.critical(
                 self, "Error",
                 "ffmpeg and ffprobe not found in PATH. Please install them and ensure they are accessible."
@@ -73,8 +141,15 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(main_widget)
         main_layout = QVBoxLayout(main_widget)
 
+        # Standard icons are fetched once; update_ui_state swaps play/pause on every playback state change
+        style = self.style()
+        self._icon_play = style.standardIcon(QStyle.StandardPixmap.SP_MediaPlay)
+        self._icon_pause = style.standardIcon(QStyle.StandardPixmap.SP_MediaPause)
+        self._icon_open = style.standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton)
+        self._icon_save = style.standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton)
+
         file_layout = QHBoxLayout()
-        self.add_file_button = QPushButton(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogOpenButton), " Add File...")
+        self.add_file_button = QPushButton(self._icon_open, " Add File...")
         file_layout.addWidget(self.add_file_button)
         self.loaded_file_label = QLabel("No video loaded.")
         self.loaded_file_label.setWordWrap(True)
@@ -93,7 +168,7 @@ class MainWindow(QMainWindow):
 
         playback_controls_layout = QHBoxLayout()
         self.play_pause_button = QPushButton()
-        self.play_pause_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
+        self.play_pause_button.setIcon(self._icon_play)
         self.play_pause_button.setToolTip("Play/Pause (Spacebar)")
         playback_controls_layout.addWidget(self.play_pause_button)
         playback_controls_layout.addStretch()
@@ -150,7 +225,7 @@ class MainWindow(QMainWindow):
         save_actions_layout.addWidget(self.split_by_tags_radio)
         main_layout.addLayout(save_actions_layout)
 
-        self.save_video_button = QPushButton(self.style().standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton)," Save Video (Ctrl+S)")
+        self.save_video_button = QPushButton(self._icon_save, " Save Video (Ctrl+S)")
         main_layout.addWidget(self.save_video_button)
 
         self.progress_bar = QProgressBar()
@@ -162,6 +237,18 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ready.")
 
+        # ~60 Hz coalescing timer for player position updates (label + timeline repaint)
+        self._ui_tick = QTimer(self)
+        self._ui_tick.setSingleShot(True)
+        self._ui_tick.setInterval(16)
+        self._ui_tick.timeout.connect(self._flush_position_update)
+
+        # Clears player_is_seeking shortly after a click/step seek; restarted (not re-created) per seek
+        self._seek_release_timer = QTimer(self)
+        self._seek_release_timer.setSingleShot(True)
+        self._seek_release_timer.setInterval(100)
+        self._seek_release_timer.timeout.connect(self._clear_player_is_seeking)
+
 
     def _init_media_player(self):
         self.media_player = QMediaPlayer()
@@ -173,6 +260,7 @@ class MainWindow(QMainWindow):
         self.media_player.positionChanged.connect(self.on_media_player_position_changed)
         self.media_player.playbackStateChanged.connect(self.on_media_player_playback_state_changed)
         self.media_player.errorOccurred.connect(self.on_media_player_error)
+        self.media_player.mediaStatusChanged.connect(self.on_media_player_media_status_changed)
 
 
     def _connect_signals(self):
@@ -205,40 +293,47 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("U"), self, self.on_undo_selection)
         QShortcut(QKeySequence(Qt.Key.Key_Delete), self, self.on_undo_current_selection_if_playhead_inside)
         QShortcut(QKeySequence(Qt.Key.Key_Space), self, self.toggle_play_pause)
+        QShortcut(QKeySequence(Qt.Key.Key_Home), self, self.seek_to_previous_keyframe)
+        QShortcut(QKeySequence("Ctrl+Shift+L"), self, self.dump_media_errors)
 
     def format_time(self, time_sec: float, show_ms: bool = True) -> str:
-        ms = int((time_sec * 1000) % 1000)
-        seconds_total = int(time_sec)
-        s = seconds_total % 60
-        m = (seconds_total // 60) % 60
-        h = seconds_total // 3600
-        if show_ms:
-            if h > 0: return f"{h:02}:{m:02}:{s:02}.{ms:03d}"
-            return f"{m:02}:{s:02}.{ms:03d}"
-        else:
-            if h > 0: return f"{h:02}:{m:02}:{s:02}"
-            return f"{m:02}:{s:02}"
+        return self.format_time_ms(int(time_sec * 1000), show_ms)
+
+    def format_time_ms(self, time_ms: int, show_ms: bool = True) -> str:
+        if time_ms >= 3_600_000:
+            return _fmt_hms_ms(time_ms) if show_ms else _fmt_hms(time_ms)
+        return _fmt_ms_ms(time_ms) if show_ms else _fmt_ms(time_ms)
 
-    def update_current_time_display(self, current_t_sec: Optional[float] = None):
-        if current_t_sec is None:
-            if self.media_player and self.media_player.source().isValid() and self.video_duration > 0:
-                 current_t_sec = self.media_player.position() / 1000.0
+    def update_current_time_display(self, current_ms: Optional[int] = None):
+        if current_ms is None:
+            if self.media_player and self._hot.has_valid_source and self.video_duration > 0:
+                 current_ms = self.media_player.position()
             else:
-                 current_t_sec = self.playhead_slider.value() / 1000.0
+                 current_ms = self.playhead_slider.value()
         
-        current_t_sec = max(0.0, min(current_t_sec, self.video_duration if self.video_duration > 0 else 0.0))
+        current_ms = max(0, min(current_ms, int(self.video_duration * 1000) if self.video_duration > 0 else 0))
 
-        total_t_str = self.format_time(self.video_duration) 
-        current_t_str = self.format_time(current_t_sec)
-        self.current_time_label.setText(f"{current_t_str} / {total_t_str}")
+        # The total duration string only changes when a new video is loaded, see on_probe_ready
+        self.current_time_label.setText(f"{self._fmt_cur(current_ms)} / {self._total_time_str}")
         
-        self.timeline_widget.set_current_playhead_time(current_t_sec)
+        self.timeline_widget.set_current_playhead_time(current_ms / 1000.0)
 
     def update_ui_state(self):
         has_video = bool(self.current_video_path and self.video_duration > 0)
         has_valid_fps = has_video and self.video_fps > 0
         is_processing = (self.prober_worker is not None and self.prober_worker.isRunning()) or \
                          (self.processor_worker is not None and self.processor_worker.isRunning())
+        has_selections = bool(self.selections)
+        has_selected_tags = self.timeline_widget.has_selected_keyframes()
+        save_action_id = self.save_action_group.checkedId()
+        is_playing = bool(self.media_player) and self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+
+        # Everything below is a pure function of these inputs; skip the widget updates if none changed
+        state = (has_video, has_valid_fps, is_processing, has_selections, has_selected_tags,
+                 save_action_id, self.current_selection_start is not None, is_playing)
+        if state == self._hot.last_ui_state:
+            return
+        self._hot.last_ui_state = state
         
         self._frame_step_buttons_enabled = has_valid_fps and not is_processing
 
@@ -253,9 +348,6 @@ class MainWindow(QMainWindow):
         self.undo_selection_button.setEnabled(has_video and not is_processing and (bool(self.selections) or self.current_selection_start is not None))
 
         self.output_format_combo.setEnabled(has_video and not is_processing)
-        
-        has_selections = bool(self.selections)
-        has_selected_tags = bool(self.timeline_widget.get_selected_keyframes())
 
         self.save_keep_selections_radio.setEnabled(has_video and not is_processing and has_selections)
         self.save_remove_selections_radio.setEnabled(has_video and not is_processing and has_selections) 
@@ -264,7 +356,6 @@ class MainWindow(QMainWindow):
         
         can_save = False
         if has_video and not is_processing:
-            save_action_id = self.save_action_group.checkedId()
             if save_action_id == 0 and has_selections: 
                 can_save = True
             elif save_action_id == 1 and has_selections: 
@@ -283,10 +374,7 @@ class MainWindow(QMainWindow):
             self.begin_selection_button.setStyleSheet("")
         
         if self.media_player and self.play_pause_button:
-            if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
-                self.play_pause_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
-            else:
-                self.play_pause_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
+            self.play_pause_button.setIcon(self._icon_pause if is_playing else self._icon_play)
 
 
     def open_file_dialog(self):
@@ -304,7 +392,7 @@ class MainWindow(QMainWindow):
             if urls and urls[0].isLocalFile():
                 filepath = urls[0].toLocalFile()
                 ext = os.path.splitext(filepath)[1].lower()
-                if ext in SUPPORTED_INPUT_EXTENSIONS:
+                if ext in SUPPORTED_INPUT_EXTENSIONS_SET:
                     event.acceptProposedAction()
 
     def dropEvent(self, event: QDropEvent):
@@ -323,19 +411,30 @@ class MainWindow(QMainWindow):
 
         self.reset_video_state() 
         self.current_video_path = filepath
+        self._basename = os.path.basename(filepath)
+        self._stem, self._ext = os.path.splitext(self._basename)
         
         if self.media_player:
-            self.media_player.setSource(QUrl.fromLocalFile(filepath))
+            self._set_media_source(QUrl.fromLocalFile(filepath)) # The only place a video's source is set
+            self.media_player.pause() # Show the first frame without starting playback
+
+        probe_cache_key = metadata_cache_key(filepath)
+        cached_probe = self.metadata_cache.get(probe_cache_key) if probe_cache_key else None
+        if cached_probe:
+            # Same file (path, size, mtime) was probed before: skip ffprobe entirely
+            self.on_probe_ready(cached_probe)
+            return
+        self._probe_cache_key = probe_cache_key # Results are stored once keyframes arrive
 
-        self.loaded_file_label.setText(f"Loading: {os.path.basename(filepath)}...")
-        self.status_bar.showMessage(f"Probing video: {os.path.basename(filepath)}...")
+        self.loaded_file_label.setText(f"Loading: {self._basename}...")
+        self.status_bar.showMessage(f"Probing video: {self._basename}...")
         self.progress_bar.setRange(0,0)
 
         self.prober_worker = VideoProberWorker(filepath)
-        self.prober_worker.info_ready.connect(self.on_video_info_ready)
-        self.prober_worker.duration_ready.connect(self.on_duration_ready)
-        self.prober_worker.fps_ready.connect(self.on_fps_ready)
+        self.prober_worker.probe_ready.connect(self.on_probe_ready)
+        self.prober_worker.keyframes_batch.connect(self.on_keyframes_batch)
         self.prober_worker.keyframes_ready.connect(self.on_keyframes_ready)
+        self.prober_worker.keyframes_incomplete.connect(self.on_keyframes_incomplete)
         self.prober_worker.error.connect(self.on_probing_error)
         self.prober_worker.finished.connect(self.on_probing_finished)
         self.prober_worker.start()
@@ -343,16 +442,22 @@ class MainWindow(QMainWindow):
 
     def reset_video_state(self):
         self.current_video_path = None
+        self._basename = self._stem = self._ext = ""
+        self._probe_cache_key = None
         self.video_info = None
         self.video_duration = 0.0 
+        self._total_time_str = self.format_time_ms(0)
+        self._fmt_cur = _fmt_ms_ms
         self.video_fps = 0.0
         self.keyframes = []
         self.selections = []
+        self._selection_starts = []
+        self._selection_max_ends = []
         self.current_selection_start = None
         
         if self.media_player:
             self.media_player.stop() 
-            self.media_player.setSource(QUrl())
+            self._set_media_source(QUrl())
 
         self.loaded_file_label.setText("No video loaded.")
         self.playhead_slider.setValue(0)
@@ -361,40 +466,61 @@ class MainWindow(QMainWindow):
         self.timeline_widget.set_keyframes([])
         self.timeline_widget.set_selections([])
         self.timeline_widget.clear_selected_keyframes()
-        self.update_current_time_display(0.0) 
+        self.update_current_time_display(0)
         self.progress_bar.setValue(0)
         self.progress_bar.setRange(0,100)
         self.update_ui_state()
 
-    def on_video_info_ready(self, video_info: Dict[str, Any]):
-        self.video_info = video_info
+    def on_probe_ready(self, payload: Dict[str, Any]):
+        """Applies probe results in one go: 'info', 'duration', 'fps' and, from the cache, 'keyframes'."""
+        self.video_info = payload["info"]
+        duration = self.video_duration = payload["duration"]
+        fps = self.video_fps = payload["fps"]
 
-    def on_duration_ready(self, duration: float):
-        self.video_duration = duration 
+        self._total_time_str = self.format_time(duration)
+        # The playhead never passes the duration, so the hours field is either always or never shown
+        self._fmt_cur = _fmt_hms_ms if duration >= 3600 else _fmt_ms_ms
         slider_max_ms = int(duration * 1000)
         self.playhead_slider.setRange(0, slider_max_ms if slider_max_ms > 0 else 1000)
-        
         self.timeline_widget.set_duration(duration)
-        self.update_current_time_display(0.0) 
-        self.loaded_file_label.setText(f"Loaded: {os.path.basename(self.current_video_path or '')} ({self.format_time(duration, False)})")
-        self.status_bar.showMessage("Video duration loaded. Detecting keyframes...")
-        
-        if self.media_player and (not self.media_player.source().isValid() or self.media_player.source().toLocalFile() != self.current_video_path) and self.current_video_path:
-             self.media_player.setSource(QUrl.fromLocalFile(self.current_video_path))
-             self.media_player.pause() 
-
-    def on_fps_ready(self, fps: float):
-        self.video_fps = fps
-        if fps > 0:
-            self.status_bar.showMessage(f"Video FPS: {fps:.2f}. Frame stepping enabled.", 3000)
+        self.update_current_time_display(0)
+        self.loaded_file_label.setText(f"Loaded: {self._basename} ({self.format_time(duration, False)})")
+
+        if "keyframes" in payload:
+            self.on_keyframes_ready(payload["keyframes"])
+        elif fps > 0:
+            self.status_bar.showMessage(f"Video FPS: {fps:.2f}. Detecting keyframes...")
         else:
-            self.status_bar.showMessage("Could not determine FPS. Frame stepping disabled.", 3000)
+            self.status_bar.showMessage("Could not determine FPS, frame stepping disabled. Detecting keyframes...")
         self.update_ui_state()
 
+    def on_keyframes_batch(self, batch: List[float]):
+        # Partial results while probing, so snapping and the timeline work before the full list arrives
+        # Batches from parallel slices interleave: sort just the batch, then merge it in linear time
+        batch = sorted(batch)
+        self.keyframes = list(heapq.merge(self.keyframes, batch))
+        self.timeline_widget.extend_keyframes(batch)
+
     def on_keyframes_ready(self, keyframes: List[float]):
         self.keyframes = keyframes
         self.timeline_widget.set_keyframes(keyframes)
-        self.status_bar.showMessage(f"Video loaded: {os.path.basename(self.current_video_path or '')}. Found {len(keyframes)} keyframes.", 5000)
+        if self._probe_cache_key and self.video_info is not None:
+            self.metadata_cache.put(self._probe_cache_key, {
+                "info": self.video_info,
+                "duration": self.video_duration,
+                "fps": self.video_fps,
+                "keyframes": keyframes,
+            })
+            self._probe_cache_key = None
+        self.status_bar.showMessage(f"Video loaded: {self._basename}. Found {len(keyframes)} keyframes.", 5000)
+
+    def on_keyframes_incomplete(self, keyframes: List[float], error_msg: str):
+        # Keep what was found for snapping, but don't cache it: the next open probes again
+        self._probe_cache_key = None
+        self.keyframes = keyframes
+        self.timeline_widget.set_keyframes(keyframes)
+        self.status_bar.showMessage(
+            f"Video loaded: {self._basename}. Keyframe detection incomplete ({len(keyframes)} found): {error_msg}", 10000)
 
     def on_probing_error(self, error_msg: str):
         QMessageBox.critical(self, "Video Load Error", error_msg)
@@ -419,55 +545,127 @@ class MainWindow(QMainWindow):
         self.update_ui_state()
 
     def on_media_player_position_changed(self, position_ms: int):
-        if not self._player_is_seeking and not self.playhead_slider.isSliderDown():
-            self.playhead_slider.blockSignals(True)
-            self.playhead_slider.setValue(position_ms)
-            self.playhead_slider.blockSignals(False)
-            self.update_current_time_display(position_ms / 1000.0)
+        if not self._hot.player_is_seeking and not self.playhead_slider.isSliderDown():
+            # Coalesce bursts of position updates into at most one UI refresh per _ui_tick interval
+            self._hot.pending_pos_ms = position_ms
+            if not self._ui_tick.isActive():
+                self._ui_tick.start()
+
+    def _flush_position_update(self):
+        if self._hot.player_is_seeking or self.playhead_slider.isSliderDown():
+            return # A seek took over since the update was queued
+        position_ms = self._hot.pending_pos_ms
+        self.playhead_slider.blockSignals(True)
+        self.playhead_slider.setValue(position_ms)
+        self.playhead_slider.blockSignals(False)
+        self.update_current_time_display(position_ms)
 
     def on_media_player_playback_state_changed(self, state: QMediaPlayer.PlaybackState):
         self.update_ui_state()
 
+    def _set_media_source(self, url: QUrl):
+        self.media_player.setSource(url)
+        self._hot.has_valid_source = url.isValid() and not url.isEmpty()
+
+    def on_media_player_media_status_changed(self, status: QMediaPlayer.MediaStatus):
+        # Some backends drop the source while the file is still being opened; re-set it only then.
+        # This asks the player itself, since has_valid_source can't see a source dropped by the backend.
+        if status == QMediaPlayer.MediaStatus.NoMedia and self.current_video_path and \
+                not self.media_player.source().isValid():
+            self._set_media_source(QUrl.fromLocalFile(self.current_video_path))
+            self.media_player.pause()
+
     def on_media_player_error(self, error: QMediaPlayer.Error, error_string: str):
         if error != QMediaPlayer.Error.NoError:
-            if self.media_player and self.media_player.source().isValid():
-                print(f"Media Player Error: {error} ({error.name}) - {error_string}")
-                self.status_bar.showMessage(f"Media player error: {error_string}", 5000)
+            if self.media_player and self._hot.has_valid_source:
+                now = time.monotonic()
+                self._err_log.append((now, error.name, error_string))
+                if now - self._err_last_ts >= 0.5: # Errors can come in storms; don't flood the status bar
+                    self.status_bar.showMessage(f"Media player error: {error_string}", 5000)
+                    self._err_last_ts = now
+
+    def dump_media_errors(self):
+        """Prints the recent media player errors kept in the ring buffer (debug aid)."""
+        now = time.monotonic()
+        for ts, name, message in self._err_log:
+            print(f"Media Player Error ({now - ts:.1f}s ago): {name} - {message}")
 
     def _seek_media_player(self, position_ms: int):
         if self.media_player and self.media_player.isSeekable() and self.video_duration > 0:
             clamped_pos_ms = max(0, min(position_ms, int(self.video_duration * 1000)))
-            self._player_is_seeking = True
+            self._hot.player_is_seeking = True
             self.media_player.setPosition(clamped_pos_ms)
-            self.update_current_time_display(clamped_pos_ms / 1000.0)
+            self.update_current_time_display(clamped_pos_ms)
         else:
             clamped_pos_ms = max(0, min(position_ms, int(self.video_duration * 1000 if self.video_duration > 0 else 0)))
-            self.update_current_time_display(clamped_pos_ms / 1000.0)
+            self.update_current_time_display(clamped_pos_ms)
 
 
     def on_playhead_slider_scrubbed(self, value_ms: int):
         self._seek_media_player(value_ms)
 
     def on_playhead_slider_released(self):
-        self._player_is_seeking = False 
+        self._hot.player_is_seeking = False 
+
+    def _clear_player_is_seeking(self):
+        self._hot.player_is_seeking = False
 
     def on_playhead_slider_action_triggered(self, action):
         if not self.playhead_slider.isSliderDown():
             value_ms = self.playhead_slider.value()
             self._seek_media_player(value_ms)
-            QTimer.singleShot(100, lambda: setattr(self, '_player_is_seeking', False))
-
+            self._seek_release_timer.start()
+
+
+    def _snap_to_keyframe(self, time_sec: float) -> float:
+        """Returns the keyframe nearest to time_sec (binary search), or time_sec if no keyframes are known."""
+        keyframes = self.keyframes # Sorted by the prober
+        if not keyframes:
+            return time_sec
+        idx = bisect.bisect_left(keyframes, time_sec)
+        if idx == 0:
+            return keyframes[0]
+        if idx == len(keyframes):
+            return keyframes[-1]
+        before, after = keyframes[idx - 1], keyframes[idx]
+        return before if time_sec - before <= after - time_sec else after
+
+    def _preceding_keyframe(self, time_sec: float) -> float:
+        """Returns the last keyframe at or before time_sec, or time_sec if there is none."""
+        idx = bisect.bisect_right(self.keyframes, time_sec) - 1
+        return self.keyframes[idx] if idx >= 0 else time_sec
+
+    @staticmethod
+    def _keyframe_ms(time_sec: float) -> int:
+        """
+        Player position (ms) of a keyframe time. Rounded up, not truncated: a position just before the
+        keyframe's pts would show (and snap back to) the previous GOP. The epsilon absorbs float error.
+        """
+        return math.ceil(time_sec * 1000 - 1e-6)
+
+    def seek_to_previous_keyframe(self):
+        if not self.current_video_path or not self.keyframes:
+            return
+        # Step back from just before the playhead, so repeated presses keep moving backwards
+        current_ms = int(self._get_current_playhead_time_sec() * 1000)
+        value_ms = self._keyframe_ms(self._preceding_keyframe((current_ms - 1) / 1000.0))
+        self.playhead_slider.blockSignals(True)
+        self.playhead_slider.setValue(value_ms)
+        self.playhead_slider.blockSignals(False)
+        self._seek_media_player(value_ms)
+        self._seek_release_timer.start()
 
     def on_timeline_clicked_playhead_change(self, time_sec: float):
-        value_ms = int(time_sec * 1000)
+        time_sec = self._snap_to_keyframe(time_sec) # Lossless cuts land on keyframes anyway
+        value_ms = self._keyframe_ms(time_sec)
         self.playhead_slider.blockSignals(True) 
         self.playhead_slider.setValue(value_ms)
         self.playhead_slider.blockSignals(False)
         self._seek_media_player(value_ms)
-        QTimer.singleShot(100, lambda: setattr(self, '_player_is_seeking', False))
+        self._seek_release_timer.start()
 
     def step_frame(self, direction: int):
-        if not self.media_player or not self.media_player.source().isValid() or self.video_fps <= 0:
+        if not self.media_player or not self._hot.has_valid_source or self.video_fps <= 0:
             return
 
         if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
@@ -509,7 +707,7 @@ class MainWindow(QMainWindow):
 
 
     def toggle_play_pause(self):
-        if not self.media_player or not self.current_video_path or not self.media_player.source().isValid():
+        if not self.media_player or not self.current_video_path or not self._hot.has_valid_source:
             return
         if self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
             self.media_player.pause()
@@ -522,7 +720,7 @@ class MainWindow(QMainWindow):
         self.update_ui_state() 
 
     def _get_current_playhead_time_sec(self) -> float:
-        if self.media_player and self.media_player.source().isValid() and self.video_duration > 0:
+        if self.media_player and self._hot.has_valid_source and self.video_duration > 0:
             if self.playhead_slider.isSliderDown():
                 return self.playhead_slider.value() / 1000.0
             return self.media_player.position() / 1000.0
@@ -544,34 +742,71 @@ class MainWindow(QMainWindow):
         end_time = self._get_current_playhead_time_sec()
         start_time = self.current_selection_start
 
+        # Snap both boundaries to keyframes, unless that would collapse the selection
+        snapped_start, snapped_end = self._snap_to_keyframe(start_time), self._snap_to_keyframe(end_time)
+        snapped = snapped_end > snapped_start + 0.01
+        if snapped:
+            start_time, end_time = snapped_start, snapped_end
+
         if end_time <= start_time + 0.01:
             QMessageBox.warning(self, "Invalid Selection", "End time must be after start time.")
             return
         
         new_selection = (start_time, end_time)
-        self.selections.append(new_selection)
-        self.selections.sort()
-
-        self.timeline_widget.set_selections(self.selections)
+        # Insert in sorted position (what bisect.insort does), keeping _selection_starts aligned
+        idx = bisect.bisect_right(self.selections, new_selection)
+        self.selections.insert(idx, new_selection)
+        self._selection_starts.insert(idx, start_time)
+        self._update_selection_max_ends()
+
+        self.timeline_widget.append_selection(start_time, end_time)
+        if snapped: # Put the playhead on the snapped end, so it shows where the cut will actually be
+            end_ms = self._keyframe_ms(end_time)
+            self.playhead_slider.blockSignals(True)
+            self.playhead_slider.setValue(end_ms)
+            self.playhead_slider.blockSignals(False)
+            self._seek_media_player(end_ms) # end_time is already a keyframe; no second snap
+            self._seek_release_timer.start()
         self.status_bar.showMessage(f"Segment selected: {self.format_time(start_time)} - {self.format_time(end_time)}", 3000)
         
         self.current_selection_start = None 
         self.update_ui_state()
 
+    def _update_selection_max_ends(self) -> None:
+        self._selection_max_ends = list(itertools.accumulate((end for _, end in self.selections), max))
+
+    def _find_selection_at(self, time_sec: float) -> Optional[int]:
+        """
+        Index of the selection containing time_sec (the latest-starting one), or None. Bisects on the sorted
+        starts, then walks back past selections that end earlier (e.g. one nested in a longer selection)
+        only while the running maximum of the ends shows an earlier one can still reach time_sec.
+        """
+        i = bisect.bisect_right(self._selection_starts, time_sec) - 1
+        while i >= 0 and self._selection_max_ends[i] >= time_sec:
+            if self.selections[i][1] >= time_sec:
+                return i
+            i -= 1
+        return None
+
     def on_undo_selection(self):
         current_time = self._get_current_playhead_time_sec()
         removed_specific = False
 
-        for i, (start, end) in enumerate(self.selections):
-            if start <= current_time <= end:
-                del self.selections[i]
-                removed_specific = True
-                self.status_bar.showMessage(f"Selection {self.format_time(start)}-{self.format_time(end)} removed.", 3000)
-                break
+        i = self._find_selection_at(current_time)
+        if i is not None:
+            start, end = self.selections.pop(i)
+            del self._selection_starts[i]
+            self._update_selection_max_ends()
+            self.timeline_widget.remove_selection_at(i)
+            removed_specific = True
+            self.status_bar.showMessage(f"Selection {self.format_time(start)}-{self.format_time(end)} removed.", 3000)
         
         if not removed_specific:
             if self.selections:
                 self.selections.clear()
+                self._selection_starts.clear()
+                self._selection_max_ends.clear()
+                self.timeline_widget.set_selections(self.selections)
                 self.status_bar.showMessage("All selections cleared.", 3000)
             elif self.current_selection_start is not None:
                  self.current_selection_start = None
@@ -579,18 +814,18 @@ class MainWindow(QMainWindow):
             else:
                 self.status_bar.showMessage("No selections to clear.", 3000)
         
-        self.timeline_widget.set_selections(self.selections)
         self.update_ui_state()
 
     def on_undo_current_selection_if_playhead_inside(self):
         current_time = self._get_current_playhead_time_sec()
-        for i, (start, end) in enumerate(self.selections):
-            if start <= current_time <= end:
-                del self.selections[i]
-                self.status_bar.showMessage(f"Selection {self.format_time(start)}-{self.format_time(end)} removed.", 3000)
-                self.timeline_widget.set_selections(self.selections)
-                self.update_ui_state()
-                return
+        i = self._find_selection_at(current_time)
+        if i is not None:
+            start, end = self.selections.pop(i)
+            del self._selection_starts[i]
+            self._update_selection_max_ends()
+            self.status_bar.showMessage(f"Selection {self.format_time(start)}-{self.format_time(end)} removed.", 3000)
+            self.timeline_widget.remove_selection_at(i)
+            self.update_ui_state()
 
     def on_output_format_changed(self, format_name: str):
         self.settings.set_last_output_format(format_name)
@@ -599,26 +834,18 @@ class MainWindow(QMainWindow):
         if not self.selections or self.video_duration <= 0:
             return [] if not self.selections else [(0, self.video_duration)] 
         
-        sorted_removed_selections = sorted(self.selections, key=lambda x: x[0])
-        
-        segments_to_keep: List[Tuple[float, float]] = []
-        current_pos = 0.0
+        duration = self.video_duration
         min_segment_duration = 0.05
 
-        for remove_start, remove_end in sorted_removed_selections:
-            remove_start = max(0.0, min(remove_start, self.video_duration))
-            remove_end = max(0.0, min(remove_end, self.video_duration))
-
-            if remove_start > current_pos:
-                segment_duration = remove_start - current_pos
-                if segment_duration >= min_segment_duration:
-                    segments_to_keep.append((current_pos, remove_start))
-            current_pos = max(current_pos, remove_end)
-
-        if current_pos < self.video_duration:
-            segment_duration = self.video_duration - current_pos
-            if segment_duration >= min_segment_duration:
-                segments_to_keep.append((current_pos, self.video_duration))
+        # self.selections is always kept sorted (see on_end_selection)
+        clamped = [(max(0.0, min(s, duration)), max(0.0, min(e, duration))) for s, e in self.selections]
+        # Gap i runs from the furthest end of selections 0..i-1 (running max, merges overlaps) to the start of selection i;
+        # the last gap runs from the furthest end of all selections to the end of the video.
+        keep_starts = [0.0, *itertools.accumulate((e for _, e in clamped), max)]
+        keep_ends = [s for s, _ in clamped] + [duration]
+        segments_to_keep: List[Tuple[float, float]] = [
+            (start, end) for start, end in zip(keep_starts, keep_ends) if end - start >= min_segment_duration
+        ]
         
         return segments_to_keep
 
@@ -634,12 +861,17 @@ class MainWindow(QMainWindow):
         
         default_ext = output_format_details["ext"]
         if default_ext is None: 
-            _, default_ext = os.path.splitext(self.current_video_path)
+            default_ext = self._ext
 
         output_tasks: List[Dict[str, Any]] = []
         save_action_id = self.save_action_group.checkedId()
 
-        base_output_filename = os.path.splitext(os.path.basename(self.current_video_path))[0]
+        base_output_filename = self._stem
+        # GIF output width only depends on the source, not on the segment: work it out once for all tasks
+        gif_scale_w: Optional[int] = None
+        if output_format_details["is_gif"] and self.video_info:
+            w = probe_summary(self.video_info).width
+            gif_scale_w = min(w if w > 0 else 480, 480)
         last_output_dir = self.settings.get_last_output_dir()
 
         segments_for_concat: List[Tuple[float, float]] = []
@@ -647,7 +879,7 @@ class MainWindow(QMainWindow):
             if not self.selections:
                 QMessageBox.information(self, "No Selections", "Please make at least one selection to save.")
                 return
-            segments_for_concat = sorted(self.selections)
+            segments_for_concat = list(self.selections) # Already sorted
         elif save_action_id == 1: 
             if not self.selections:
                 segments_for_concat = [(0, self.video_duration)]
@@ -675,9 +907,16 @@ class MainWindow(QMainWindow):
                 "output_format_key": output_format_key,
                 "segments": segments_for_concat
             }
-            if output_format_details["is_gif"] and self.video_info:
-                w, _ = get_video_dimensions(self.video_info)
-                task["gif_scale_w"] = min(w if w > 0 else 480, 480)
+            if output_format_details["needs_reencode"] and not output_format_details["is_gif"] \
+                    and not output_format_details["is_audio_only"]:
+                # One ffmpeg decodes just the segments and encodes the joined result once, without temp files
+                task["concat_mode"] = "filter"
+                task["has_audio"] = any(s.get("codec_type") == "audio" for s in (self.video_info or {}).get("streams", []))
+            elif not output_format_details["is_gif"]:
+                # Join the cut segments with the concat demuxer and -c copy when their streams match
+                task["concat_mode"] = "demuxer_copy"
+            if gif_scale_w is not None:
+                task["gif_scale_w"] = gif_scale_w
             output_tasks.append(task)
 
         elif save_action_id == 2: 
@@ -698,9 +937,8 @@ class MainWindow(QMainWindow):
                     "start_time": start_t,
                     "end_time": end_t
                 }
-                if output_format_details["is_gif"] and self.video_info:
-                    w, _ = get_video_dimensions(self.video_info)
-                    task["gif_scale_w"] = min(w if w > 0 else 480, 480)
+                if gif_scale_w is not None:
+                    task["gif_scale_w"] = gif_scale_w
                 output_tasks.append(task)
         
         elif save_action_id == 3: 
@@ -715,6 +953,14 @@ class MainWindow(QMainWindow):
 
             split_points = [0.0] + selected_tags + [self.video_duration]
             split_points = sorted(list(set(p for p in split_points if p <= self.video_duration + 0.001)))
+            # Collapse points less than a frame apart in one pass, so no ffmpeg run is spent on an empty sliver
+            min_gap = 1.0 / self.video_fps if self.video_fps > 0 else 0.05
+            merged_points = [split_points[0]]
+            for p in split_points[1:]:
+                if p - merged_points[-1] > min_gap:
+                    merged_points.append(p)
+            merged_points[-1] = split_points[-1] # Always run to the end of the video
+            split_points = merged_points
 
             processed_segments_count = 0
             for i in range(len(split_points) - 1):
@@ -735,22 +981,31 @@ class MainWindow(QMainWindow):
                     "start_time": start_t,
                     "end_time": end_t
                 }
-                if output_format_details["is_gif"] and self.video_info:
-                    w, _ = get_video_dimensions(self.video_info)
-                    task["gif_scale_w"] = min(w if w > 0 else 480, 480)
+                if gif_scale_w is not None:
+                    task["gif_scale_w"] = gif_scale_w
                 output_tasks.append(task)
 
+            if not output_format_details["needs_reencode"] and len(output_tasks) > 1:
+                # Tag splits cover the whole video and start on keyframes: stream-copy them all in one ffmpeg pass
+                output_tasks = [{
+                    "type": "multi_cut",
+                    "output_format_key": output_format_key,
+                    "outputs": output_tasks,
+                }]
+
         if not output_tasks:
             self.status_bar.showMessage("No tasks to perform based on current settings.", 3000)
             return
 
         self.progress_bar.setValue(0)
+        self._last_progress_pct = -1
         self.status_bar.showMessage("Starting video processing...")
         if not self.current_video_path:
             QMessageBox.critical(self, "Error", "Internal error: No input video path for processing.")
             return
             
-        self.processor_worker = VideoProcessorWorker(self.current_video_path, output_tasks)
+        self.processor_worker = VideoProcessorWorker(self.current_video_path, output_tasks,
+                                                     max_parallel=os.cpu_count() or 1)
         self.processor_worker.progress_update.connect(self.on_processing_progress)
         self.processor_worker.segment_processed.connect(self.on_processing_segment_done)
         self.processor_worker.finished.connect(self.on_processing_finished)
@@ -760,6 +1015,12 @@ class MainWindow(QMainWindow):
 
 
     def on_processing_progress(self, percentage: int, message: str):
+        # ffmpeg can report many times per second; only repaint when the percentage moves or 100 ms passed
+        now = time.monotonic()
+        if abs(percentage - self._last_progress_pct) < 1 and now - self._last_progress_ts <= 0.1:
+            return
+        self._last_progress_pct = percentage
+        self._last_progress_ts = now
         self.progress_bar.setValue(percentage)
         self.status_bar.showMessage(message)
 
@@ -784,6 +1045,7 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event: QCloseEvent): # QCloseEvent for type hint
         if self.media_player: 
             self.media_player.stop()
+        self.metadata_cache.close()
 
         if self.processor_worker and self.processor_worker.isRunning():
             reply = QMessageBox.question(self, 'Confirm Exit',
@@ -791,6 +1053,11 @@ class MainWindow(QMainWindow):
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 self.processor_worker.cancel()
+                # cancel() stops its ffmpeg processes (killing any that ignore SIGTERM), so the worker unwinds
+                # on its own; wait for it rather than terminate() a thread that is running Python code
+                self.status_bar.showMessage("Cancelling processing, exiting...")
+                self.status_bar.repaint() # Paint now; the event loop doesn't run while we wait
+                self.processor_worker.wait()
                 event.accept()
             else:
                 event.ignore()
@@ -0,0 +1,94 @@
+# lossless_video_cutter/metadata_cache.py
+from PyQt6.QtCore import QStandardPaths
+import os
+import json
+import sqlite3
+import time
+from typing import Dict, Optional, Any
+
+from app_config import METADATA_CACHE_DB_NAME, METADATA_CACHE_MAX_ENTRIES, METADATA_CACHE_MAX_BYTES
+
+
+def metadata_cache_key(filepath: str) -> Optional[str]:
+    """Identifies a file's current contents by absolute path, size and mtime. None if it can't be stat'ed."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return f"{os.path.abspath(filepath)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+class MetadataCache:
+    """
+    Persistent cache of ffprobe results ('info', 'duration', 'fps', 'keyframes') keyed by metadata_cache_key,
+    so re-opening a video skips probing. Kept in SQLite in the app data directory, so only the requested
+    entry is read and writes are atomic. Trimmed to the max_entries most recently used videos, and
+    further if their payloads exceed max_bytes (long videos have large keyframe lists).
+    """
+    def __init__(self, max_entries: int = METADATA_CACHE_MAX_ENTRIES, max_bytes: int = METADATA_CACHE_MAX_BYTES):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._db: Optional[sqlite3.Connection] = None # Opened lazily on first access
+
+    def _get_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            data_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+            os.makedirs(data_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(data_dir, METADATA_CACHE_DB_NAME))
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS metadata_cache (key TEXT PRIMARY KEY, json BLOB, last_used REAL, size INTEGER)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(metadata_cache)")}
+            if "size" not in columns: # Database from before the size column existed
+                with self._db:
+                    self._db.execute("ALTER TABLE metadata_cache ADD COLUMN size INTEGER")
+                    self._db.execute("UPDATE metadata_cache SET size = LENGTH(CAST(json AS BLOB))")
+        return self._db
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached payload for key, or None on a miss."""
+        try:
+            db = self._get_db()
+            row = db.execute("SELECT json FROM metadata_cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            # LRU bookkeeping, committed right away so no write lock is held between calls
+            with db:
+                db.execute("UPDATE metadata_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"Warning: Could not read metadata cache: {e}")
+            return None
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        try:
+            db = self._get_db()
+            with db: # Commits on success
+                data = json.dumps(payload, separators=(",", ":"))
+                # Byte size stored alongside, so the size cap below never has to read the payloads
+                db.execute("INSERT OR REPLACE INTO metadata_cache (key, json, last_used, size) VALUES (?, ?, ?, ?)",
+                           (key, data, time.time(), len(data.encode("utf-8"))))
+                # Evict the least recently used entries beyond the limit
+                db.execute(
+                    "DELETE FROM metadata_cache WHERE key NOT IN "
+                    "(SELECT key FROM metadata_cache ORDER BY last_used DESC LIMIT ?)",
+                    (self._max_entries,)
+                )
+                db.execute(
+                    "DELETE FROM metadata_cache WHERE key IN (SELECT key FROM "
+                    "(SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS total FROM metadata_cache) "
+                    "WHERE total > ?)",
+                    (self._max_bytes,)
+                )
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not write metadata cache: {e}")
+
+    def close(self) -> None:
+        """Closes the database. Called on application shutdown."""
+        if self._db is not None:
+            try:
+                self._db.commit()
+                self._db.close()
+            except sqlite3.Error as e:
+                print(f"Warning: Could not close metadata cache: {e}")
+            self._db = None
@@ -1,7 +1,11 @@
 # lossless_video_cutter/ui_timeline.py
 from PyQt6.QtWidgets import QWidget, QSizePolicy
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QFont, QFontMetrics
-from PyQt6.QtCore import Qt, QRectF, QPointF, pyqtSignal
+from PyQt6.QtGui import QPainter, QPainterPath, QPixmap, QColor, QPen, QBrush, QFont, QFontMetrics
+from PyQt6.QtCore import Qt, QRect, QRectF, QSize, QPointF, QLineF, QTimer, pyqtSignal
+import array
+import bisect
+import functools
+import heapq
 from typing import List, Tuple, Set, Optional
 
 from app_config import (
@@ -10,6 +14,17 @@ from app_config import (
     TIMELINE_PLAYHEAD_COLOR
 )
 
+@functools.lru_cache(maxsize=4096)
+def _format_time_ms(time_ms: int) -> str:
+    """Formats whole milliseconds as [HH:]MM:SS.mmm. Memoized: ruler labels and playhead times repeat a lot."""
+    h, rem = divmod(time_ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
+    if h > 0:
+        return f"{h:02}:{m:02}:{s:02}.{ms:03d}"
+    return f"{m:02}:{s:02}.{ms:03d}"
+
+
 class TimelineWidget(QWidget):
     playhead_pos_changed_by_click = pyqtSignal(float)  # Emits time in seconds
     keyframe_tag_clicked = pyqtSignal(float) # Emits keyframe time
@@ -19,71 +34,213 @@ class TimelineWidget(QWidget):
         self.setMinimumHeight(TIMELINE_HEIGHT)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
 
+        self._font = QFont("Arial", 8)
+        self._fm = QFontMetrics(self._font) # Built once; paints and ruler rebuilds reuse it
         self._duration: float = 0.0  # Total duration in seconds
-        self._keyframes: List[float] = []
-        self._selected_keyframes: Set[float] = set()
+        # Sorted keyframe times, stored unboxed (8 bytes each); bisect and indexing work on it like on a list
+        self._keyframes: array.array = array.array('d')
+        self._selected_keyframes: Set[int] = set() # Indices into _keyframes (no float equality involved)
         self._selections: List[Tuple[float, float]] = [] # List of (start_time, end_time)
         self._current_playhead_time: float = 0.0
+        # Pixels per second and seconds per pixel, kept in sync by set_duration/resizeEvent
+        self._x_scale: float = 0.0
+        self._t_scale: float = 0.0
+        # Keyframe marker geometry (unselected lines, selected lines, selected dots) for _kf_geometry_key;
+        # None when keyframes or their selection changed
+        self._kf_geometry: Optional[Tuple[List[QLineF], List[QLineF], QPainterPath]] = None
+        self._kf_geometry_key: Tuple[int, int, float] = (0, 0, 0.0) # width, height, duration
+        # Ruler tick lines and labels for _ruler_cache_key; depends only on size and duration
+        self._ruler_cache: Optional[Tuple[List[QLineF], List[QLineF], List[Tuple[QPointF, str]]]] = None
+        self._ruler_cache_key: Tuple[int, int, float] = (0, 0, 0.0) # width, height, duration
+        # Background, ruler, selections and keyframes pre-rendered; only the playhead is drawn per paint.
+        # Setters just raise _dirty_static (Qt merges their update() calls); paintEvent re-renders once.
+        self._static_layer: Optional[QPixmap] = None
+        self._dirty_static: bool = True
+        # Part of the static layer to re-render when only a span changed (e.g. one selection added/removed)
+        self._static_dirty_rect = QRect()
+        # Half-width of the band repainted around the playhead: the line plus its time label on either side
+        self._playhead_reach = self._fm.horizontalAdvance("00:00:00.000") + 8
+
+        # Drag-seeks are coalesced to ~30 Hz: each emit makes the player seek (and decode) again
+        self._pending_seek_time: Optional[float] = None
+        self._seek_timer = QTimer(self)
+        self._seek_timer.setSingleShot(True)
+        self._seek_timer.setInterval(33)
+        self._seek_timer.timeout.connect(self._flush_seek)
 
-        self._font = QFont("Arial", 8)
         self._keyframe_marker_height = 15
         self._tag_clickable_radius = 5 # pixels
 
     def set_duration(self, duration: float):
         self._duration = max(0.0, duration)
+        self._update_scale_factors()
+        self._dirty_static = True
         self.update()
 
     def set_keyframes(self, keyframes: List[float]):
-        self._keyframes = sorted(keyframes)
+        selected_times = self.get_selected_keyframes()
+        self._keyframes = array.array('d', sorted(keyframes))
+        self._reindex_selected_keyframes(selected_times)
+        self._kf_geometry = None
+        self._dirty_static = True
         self.update()
 
+    def extend_keyframes(self, keyframes: List[float]):
+        """
+        Adds sorted keyframes to the ones already shown (used while they are still being probed).
+        They are merged in linear time and only the span they cover is repainted.
+        """
+        if not keyframes:
+            return
+        selected_times = self.get_selected_keyframes()
+        self._keyframes = array.array('d', heapq.merge(self._keyframes, keyframes))
+        if selected_times:
+            self._reindex_selected_keyframes(selected_times)
+        self._kf_geometry = None # Rebuilt on the next full static render
+        # Slack for the pen width and the selected-keyframe dots, as in _render_static_rect
+        x_start = int(self._time_to_x(keyframes[0])) - 4
+        x_end = int(self._time_to_x(keyframes[-1])) + 5
+        self._invalidate_static_rect(QRect(x_start, 0, x_end - x_start, self.height()))
+
     def set_selections(self, selections: List[Tuple[float, float]]):
-        self._selections = selections
+        self._selections = list(selections) # Own copy; append/remove below keep it in sync incrementally
+        self._dirty_static = True
         self.update()
+
+    def append_selection(self, start_time: float, end_time: float):
+        """Adds one selection in sorted position (same order as MainWindow.selections), repainting only its span."""
+        bisect.insort(self._selections, (start_time, end_time))
+        self._invalidate_static_rect(self._selection_update_rect(start_time, end_time))
+
+    def remove_selection_at(self, index: int):
+        start_time, end_time = self._selections.pop(index)
+        self._invalidate_static_rect(self._selection_update_rect(start_time, end_time))
+
+    def _invalidate_static_rect(self, rect: QRect):
+        self._static_dirty_rect = self._static_dirty_rect.united(rect)
+        self.update(rect)
+
+    def _selection_update_rect(self, start_time: float, end_time: float) -> QRect:
+        # A pixel of slack on each side for the antialiased edges
+        x_start = int(self._time_to_x(start_time)) - 1
+        x_end = int(self._time_to_x(end_time)) + 2
+        return QRect(x_start, 0, x_end - x_start, self.height())
     
+    def _reindex_selected_keyframes(self, selected_times: List[float]):
+        # Keyframe indices shift when the list changes; map the selected times back onto the new list
+        keyframes = self._keyframes
+        self._selected_keyframes = set()
+        for t in selected_times:
+            idx = bisect.bisect_left(keyframes, t)
+            if idx < len(keyframes) and keyframes[idx] == t:
+                self._selected_keyframes.add(idx)
+
+    def _nearest_keyframe_index(self, time_sec: float) -> Optional[int]:
+        """Index of the keyframe closest to time_sec (binary search on the sorted list), or None if there are none."""
+        idx = bisect.bisect_left(self._keyframes, time_sec)
+        candidates = range(max(0, idx - 1), min(idx + 1, len(self._keyframes)))
+        return min(candidates, key=lambda i: abs(self._keyframes[i] - time_sec)) if candidates else None
+
     def toggle_keyframe_selection(self, time_sec: float):
         # Find the closest keyframe to time_sec within a small tolerance
-        closest_kf = None
-        min_diff = float('inf')
-        for kf_time in self._keyframes:
-            diff = abs(kf_time - time_sec)
-            if diff < 0.1: # Tolerance for clicking near a keyframe
-                if diff < min_diff:
-                    min_diff = diff
-                    closest_kf = kf_time
+        closest_idx = self._nearest_keyframe_index(time_sec)
+        if closest_idx is not None and abs(self._keyframes[closest_idx] - time_sec) >= 0.1: # Tolerance for clicking near a keyframe
+            closest_idx = None
         
-        if closest_kf is not None:
-            if closest_kf in self._selected_keyframes:
-                self._selected_keyframes.remove(closest_kf)
-            else:
-                self._selected_keyframes.add(closest_kf)
+        if closest_idx is not None:
+            self._selected_keyframes ^= {closest_idx}
+            self._kf_geometry = None
+            self._dirty_static = True
             self.update()
             return True
         return False
 
     def get_selected_keyframes(self) -> List[float]:
-        return sorted(list(self._selected_keyframes))
+        return [self._keyframes[i] for i in sorted(self._selected_keyframes)] # Index order is time order
+
+    def has_selected_keyframes(self) -> bool:
+        return bool(self._selected_keyframes) # O(1), unlike building the sorted list
 
     def clear_selected_keyframes(self):
         self._selected_keyframes.clear()
+        self._kf_geometry = None
+        self._dirty_static = True
         self.update()
 
     def set_current_playhead_time(self, time_sec: float):
-        self._current_playhead_time = max(0.0, min(time_sec, self._duration))
-        self.update()
+        time_sec = max(0.0, min(time_sec, self._duration))
+        if time_sec == self._current_playhead_time:
+            return
+        # Only the bands around the old and new playhead change; the static layer covers the rest
+        old_rect = self._playhead_rect(self._current_playhead_time)
+        self._current_playhead_time = time_sec
+        self.update(old_rect)
+        self.update(self._playhead_rect(time_sec))
+
+    def _playhead_rect(self, time_sec: float) -> QRect:
+        x = int(self._time_to_x(time_sec))
+        return QRect(x - self._playhead_reach, 0, 2 * self._playhead_reach, self.height())
+
+    def _update_scale_factors(self):
+        width = self.width()
+        self._x_scale = width / self._duration if self._duration > 0 else 0.0
+        self._t_scale = self._duration / width if width > 0 else 0.0
 
     def _time_to_x(self, time_sec: float) -> float:
-        if self._duration == 0:
-            return 0
-        return (time_sec / self._duration) * self.width()
+        return time_sec * self._x_scale
 
     def _x_to_time(self, x_pos: float) -> float:
-        if self.width() == 0:
-            return 0
-        return (x_pos / self.width()) * self._duration
+        return x_pos * self._t_scale
+
+    def resizeEvent(self, event):
+        self._update_scale_factors()
+        self._dirty_static = True
+        super().resizeEvent(event)
 
     def paintEvent(self, event):
+        if self._dirty_static or self._static_layer is None:
+            self._static_layer = self._render_static_layer()
+            self._dirty_static = False
+            self._static_dirty_rect = QRect()
+        elif not self._static_dirty_rect.isEmpty():
+            self._render_static_rect(self._static_dirty_rect)
+            self._static_dirty_rect = QRect()
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer)
+        if self._duration == 0:
+            return
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Draw playhead
+        x_playhead = self._time_to_x(self._current_playhead_time)
+        playhead_pen = QPen(QColor(TIMELINE_PLAYHEAD_COLOR))
+        playhead_pen.setWidth(2)
+        painter.setPen(playhead_pen)
+        painter.drawLine(QPointF(x_playhead, 0), QPointF(x_playhead, self.height()))
+        
+        # Draw playhead time label near playhead
+        fm = self._fm
+        # Quantized to 100 ms so the cached strings get reused while playing/scrubbing
+        time_str = _format_time_ms(int(self._current_playhead_time * 10) * 100)
+        text_width = fm.horizontalAdvance(time_str)
+        text_x = x_playhead + 5
+        if text_x + text_width > self.width():
+            text_x = x_playhead - text_width - 5
+        text_y = fm.ascent() + 2 # Top of timeline
+        painter.setPen(QColor(TIMELINE_MARKER_COLOR))
+        painter.setFont(self._font)
+        painter.drawText(QPointF(text_x, text_y), time_str)
+
+
+    def _render_static_layer(self) -> QPixmap:
+        """Renders everything except the playhead into a pixmap the size of the widget."""
+        dpr = self.devicePixelRatioF()
+        pixel_size = QSize(max(1, round(self.width() * dpr)), max(1, round(self.height() * dpr)))
+        pixmap = self._static_layer
+        if pixmap is None or pixmap.size() != pixel_size: # Otherwise re-render into the existing pixmap
+            pixmap = QPixmap(pixel_size)
+        pixmap.setDevicePixelRatio(dpr) # Keeps it sharp on HiDPI screens
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
         # Background
@@ -93,7 +250,8 @@ class TimelineWidget(QWidget):
             painter.setPen(QColor(TIMELINE_MARKER_COLOR))
             painter.setFont(self._font)
             painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Load a video file")
-            return
+            painter.end()
+            return pixmap
 
         # Draw time ruler and ticks
         self._draw_ruler(painter)
@@ -111,51 +269,111 @@ class TimelineWidget(QWidget):
         selected_keyframe_pen = QPen(QColor(TIMELINE_SELECTED_KEYFRAME_COLOR))
         selected_keyframe_pen.setWidth(2) # Thicker for selected
 
-        for kf_time in self._keyframes:
-            x_kf = self._time_to_x(kf_time)
-            if kf_time in self._selected_keyframes:
-                painter.setPen(selected_keyframe_pen)
-                painter.setBrush(QColor(TIMELINE_SELECTED_KEYFRAME_COLOR))
-                # Draw a small circle or different marker for selected keyframes
-                painter.drawEllipse(QPointF(x_kf, self.height() - self._keyframe_marker_height - 5), 3, 3)
+        # One batched draw call per pen instead of a pen switch and draw call per keyframe
+        unselected_lines, selected_lines, selected_dots = self._keyframe_geometry()
+        if unselected_lines:
+            painter.setPen(keyframe_pen)
+            painter.drawLines(unselected_lines)
+        if selected_lines:
+            painter.setPen(selected_keyframe_pen)
+            painter.setBrush(QColor(TIMELINE_SELECTED_KEYFRAME_COLOR))
+            painter.drawPath(selected_dots) # A small circle marks selected keyframes
+            painter.drawLines(selected_lines)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        painter.end()
+        return pixmap
+
+    def _render_static_rect(self, rect: QRect):
+        """Re-renders just rect of the static layer, drawing only the keyframes that fall inside it."""
+        rect = rect.intersected(self.rect())
+        if rect.isEmpty() or self._duration == 0:
+            return
+        painter = QPainter(self._static_layer)
+        painter.setClipRect(rect)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(rect, QColor("#303030"))
+        self._draw_ruler(painter)
 
+        for start_time, end_time in self._selections:
+            x_start = self._time_to_x(start_time)
+            x_end = self._time_to_x(end_time)
+            if x_end < rect.left() or x_start > rect.right() + 1:
+                continue
+            painter.fillRect(QRectF(x_start, 0, x_end - x_start, self.height() * 0.7), QColor(TIMELINE_SELECTION_COLOR))
+
+        # Visible slice of the sorted keyframes; the slack covers pen width and the selected-keyframe dots
+        t0 = self._x_to_time(rect.left() - 4)
+        t1 = self._x_to_time(rect.right() + 4)
+        lo = bisect.bisect_left(self._keyframes, t0)
+        hi = bisect.bisect_right(self._keyframes, t1)
+        height = self.height()
+        top = height - self._keyframe_marker_height
+        selected = self._selected_keyframes
+        unselected_lines = []
+        selected_lines = []
+        selected_dots = QPainterPath()
+        for i in range(lo, hi):
+            x_kf = self._time_to_x(self._keyframes[i])
+            if i in selected:
+                selected_lines.append(QLineF(x_kf, top, x_kf, height))
+                selected_dots.addEllipse(QPointF(x_kf, top - 5), 3, 3)
             else:
-                painter.setPen(keyframe_pen)
-                painter.setBrush(Qt.BrushStyle.NoBrush)
-
-            painter.drawLine(QPointF(x_kf, self.height() - self._keyframe_marker_height),
-                             QPointF(x_kf, self.height()))
+                unselected_lines.append(QLineF(x_kf, top, x_kf, height))
+        if unselected_lines:
+            keyframe_pen = QPen(QColor(TIMELINE_KEYFRAME_COLOR))
+            keyframe_pen.setWidth(1)
+            painter.setPen(keyframe_pen)
+            painter.drawLines(unselected_lines)
+        if selected_lines:
+            selected_keyframe_pen = QPen(QColor(TIMELINE_SELECTED_KEYFRAME_COLOR))
+            selected_keyframe_pen.setWidth(2)
+            painter.setPen(selected_keyframe_pen)
+            painter.setBrush(QColor(TIMELINE_SELECTED_KEYFRAME_COLOR))
+            painter.drawPath(selected_dots)
+            painter.drawLines(selected_lines)
+        painter.end()
+
+    def _keyframe_geometry(self) -> Tuple[List[QLineF], List[QLineF], QPainterPath]:
+        """Keyframe marker lines (unselected, selected) and selected-keyframe dots, rebuilt only when stale."""
+        key = (self.width(), self.height(), self._duration)
+        if self._kf_geometry is None or self._kf_geometry_key != key:
+            height = self.height()
+            top = height - self._keyframe_marker_height
+            scale = self._x_scale
+            selected = self._selected_keyframes
+            unselected_lines = [QLineF(kf * scale, top, kf * scale, height)
+                                for i, kf in enumerate(self._keyframes) if i not in selected]
+            selected_lines = []
+            selected_dots = QPainterPath()
+            for kf in self.get_selected_keyframes():
+                x_kf = kf * scale
+                selected_lines.append(QLineF(x_kf, top, x_kf, height))
+                selected_dots.addEllipse(QPointF(x_kf, top - 5), 3, 3)
+            self._kf_geometry = (unselected_lines, selected_lines, selected_dots)
+            self._kf_geometry_key = key
+        return self._kf_geometry
 
+    def _draw_ruler(self, painter: QPainter):
+        if self._duration <= 0: return
 
-        # Draw playhead
-        x_playhead = self._time_to_x(self._current_playhead_time)
-        playhead_pen = QPen(QColor(TIMELINE_PLAYHEAD_COLOR))
-        playhead_pen.setWidth(2)
-        painter.setPen(playhead_pen)
-        painter.drawLine(QPointF(x_playhead, 0), QPointF(x_playhead, self.height()))
-        
-        # Draw playhead time label near playhead
-        fm = QFontMetrics(self._font)
-        time_str = self.format_time(self._current_playhead_time)
-        text_width = fm.horizontalAdvance(time_str)
-        text_x = x_playhead + 5
-        if text_x + text_width > self.width():
-            text_x = x_playhead - text_width - 5
-        text_y = fm.ascent() + 2 # Top of timeline
-        painter.setPen(QColor(TIMELINE_MARKER_COLOR))
+        minor_lines, major_lines, labels = self._ruler_geometry()
         painter.setFont(self._font)
-        painter.drawText(QPointF(text_x, text_y), time_str)
+        painter.setPen(QColor(TIMELINE_MARKER_COLOR).darker(120))
+        painter.drawLines(minor_lines)
+        painter.setPen(QColor(TIMELINE_MARKER_COLOR))
+        painter.drawLines(major_lines)
+        for label_pos, time_str in labels:
+            painter.drawText(label_pos, time_str)
 
+    def _ruler_geometry(self) -> Tuple[List[QLineF], List[QLineF], List[Tuple[QPointF, str]]]:
+        """Tick lines and (already overlap-filtered) labels of the ruler, rebuilt when size or duration change."""
+        key = (self.width(), self.height(), self._duration)
+        if self._ruler_cache is not None and self._ruler_cache_key == key:
+            return self._ruler_cache
 
-    def _draw_ruler(self, painter: QPainter):
-        painter.setFont(self._font)
-        fm = QFontMetrics(self._font)
-        
-        # Determine tick interval based on duration and width
-        # Aim for a reasonable number of labels
-        num_major_ticks_ideal = self.width() / 80 # approx one label every 80px
-        
-        if self._duration <= 0: return
+        fm = self._fm
+        width, height = self.width(), self.height()
 
         if self._duration <= 10: # seconds
             major_tick_interval = 1.0
@@ -175,51 +393,51 @@ class TimelineWidget(QWidget):
         else: # Very long
             major_tick_interval = 60.0 * 30 # 30 minutes
             minor_tick_interval = 60.0 * 5  # 5 minutes
-        
-        # Minor ticks
-        painter.setPen(QColor(TIMELINE_MARKER_COLOR).darker(120))
-        num_minor_ticks = int(self._duration / minor_tick_interval)
-        for i in range(num_minor_ticks + 1):
-            time_sec = i * minor_tick_interval
-            x = self._time_to_x(time_sec)
-            painter.drawLine(QPointF(x, self.height() * 0.85), QPointF(x, self.height()))
+
+        scale = self._x_scale # Pixels per second
+
+        # Minor ticks, skipping the ones a major tick is drawn over anyway
+        minor_step = minor_tick_interval * scale
+        minor_top = height * 0.85
+        minor_per_major = round(major_tick_interval / minor_tick_interval)
+        minor_lines = [QLineF(i * minor_step, minor_top, i * minor_step, height)
+                       for i in range(int(self._duration / minor_tick_interval) + 1) if i % minor_per_major]
 
         # Major ticks and labels
-        painter.setPen(QColor(TIMELINE_MARKER_COLOR))
-        num_major_ticks = int(self._duration / major_tick_interval)
+        major_top = height * 0.7
+        label_y = major_top - fm.descent()
+        major_lines: List[QLineF] = []
+        labels: List[Tuple[QPointF, str]] = []
         last_label_end_x = -1
-
-        for i in range(num_major_ticks + 1):
+        for i in range(int(self._duration / major_tick_interval) + 1):
             time_sec = i * major_tick_interval
-            x = self._time_to_x(time_sec)
-            painter.drawLine(QPointF(x, self.height() * 0.7), QPointF(x, self.height()))
+            x = time_sec * scale
+            major_lines.append(QLineF(x, major_top, x, height))
 
             time_str = self.format_time(time_sec)
             text_width = fm.horizontalAdvance(time_str)
-            
+
             label_x = x - text_width / 2
             # Prevent label overlap
-            if label_x > last_label_end_x + 5 and label_x + text_width < self.width() -5 :
-                painter.drawText(QPointF(label_x, self.height() * 0.7 - fm.descent()), time_str)
+            if label_x > last_label_end_x + 5 and label_x + text_width < width - 5:
+                labels.append((QPointF(label_x, label_y), time_str))
                 last_label_end_x = label_x + text_width
 
+        self._ruler_cache = (minor_lines, major_lines, labels)
+        self._ruler_cache_key = key
+        return self._ruler_cache
+
     def format_time(self, time_sec: float) -> str:
-        ms = int((time_sec * 1000) % 1000)
-        seconds_total = int(time_sec)
-        s = seconds_total % 60
-        m = (seconds_total // 60) % 60
-        h = seconds_total // 3600
-        if h > 0:
-            return f"{h:02}:{m:02}:{s:02}.{ms:03d}"
-        else:
-            return f"{m:02}:{s:02}.{ms:03d}"
+        return _format_time_ms(int(time_sec * 1000))
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             clicked_time = self._x_to_time(event.position().x())
             
-            # Check if a keyframe tag was clicked
-            for kf_time in self._keyframes:
+            # Check if a keyframe tag was clicked: only the keyframe nearest the click can be within the radius
+            kf_idx = self._nearest_keyframe_index(clicked_time)
+            if kf_idx is not None:
+                kf_time = self._keyframes[kf_idx]
                 x_kf = self._time_to_x(kf_time)
                 # Check distance from click to keyframe marker visual representation
                 # A simple check: if click x is close to keyframe x, and y is in the lower part
@@ -233,6 +451,18 @@ class TimelineWidget(QWidget):
 
     def mouseMoveEvent(self, event):
         if event.buttons() & Qt.MouseButton.LeftButton:
-            # If dragging, update playhead
-            clicked_time = self._x_to_time(event.position().x())
-            self.playhead_pos_changed_by_click.emit(clicked_time)
\ No newline at end of file
+            # If dragging, update playhead (the latest position is emitted when the timer fires)
+            self._pending_seek_time = self._x_to_time(event.position().x())
+            if not self._seek_timer.isActive():
+                self._seek_timer.start()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self._seek_timer.isActive():
+            self._seek_timer.stop()
+            self._flush_seek() # Land exactly where the drag ended
+        super().mouseReleaseEvent(event)
+
+    def _flush_seek(self):
+        if self._pending_seek_time is not None:
+            self.playhead_pos_changed_by_click.emit(self._pending_seek_time)
+            self._pending_seek_time = None
\ No newline at end of file
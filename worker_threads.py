@@ -1,75 +1,165 @@
 # lossless_video_cutter/worker_threads.py
-from PyQt6.QtCore import QThread, pyqtSignal, QObject
-from typing import List, Dict, Any, Tuple, Optional # Ensure these are here from previous versions
+from PyQt6.QtCore import QThread, QThreadPool, QRunnable, pyqtSignal, QObject
+from typing import List, Dict, Any, Tuple, Optional, Set, Callable # Ensure these are here from previous versions
 import os # Ensure os is imported
 import shutil # Ensure shutil is imported
 import tempfile # Ensure tempfile is imported
+import threading
+import atexit
+import operator
+import concurrent.futures
 
 
 from ffmpeg_utils import (
     get_video_info,
-    get_keyframes,
-    get_video_duration,
-    get_video_fps, # Ensure this is correctly imported
+    get_video_info_and_keyframes,
+    get_keyframes_parallel,
+    KeyframeProbeError,
+    KEYFRAME_HEAD_PROBE_SEC,
+    probe_summary,
+    build_cut_command,
+    build_multi_cut_command,
+    build_multi_input_cut_command,
+    build_concat_filter_command,
+    hw_format_args,
+    is_hw_init_failure,
+    mark_hw_encoding_failed,
     FfmpegProcess
 )
-from app_config import OUTPUT_FORMATS, TEMP_DIR_NAME # Ensure these are here
+from app_config import OUTPUT_FORMATS, TEMP_DIR_NAME, CONCAT_PROTOCOL_EXTENSIONS, HW_ENCODE_MAX_SESSIONS # Ensure these are here
 
 
-class VideoProberWorker(QThread):
-    """Worker thread for ffprobe operations (duration, keyframes, fps)."""
-    info_ready = pyqtSignal(dict)
-    duration_ready = pyqtSignal(float)
-    fps_ready = pyqtSignal(float) # <--- THIS IS THE CRUCIAL LINE
-    keyframes_ready = pyqtSignal(list)
-    error = pyqtSignal(str)
+_GIF_FFMPEG_ARGS = OUTPUT_FORMATS["GIF (Animated)"]["ffmpeg_args"]
 
-    def __init__(self, filepath: str, parent: Optional[QObject] = None):
-        super().__init__(parent)
+
+def _total_duration(segments: List[Tuple[float, float]]) -> float:
+    """Sum of (end - start) over segments; zip/map keep the loop in C instead of a generator."""
+    if not segments:
+        return 0.0
+    starts, ends = zip(*segments)
+    return sum(map(operator.sub, ends, starts))
+
+
+class _TempDirPool:
+    """
+    Scratch directories for concat segments, reused across jobs: a released directory is only
+    emptied (its files unlinked), and removed for good at interpreter exit.
+    """
+    MAX_IDLE = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: List[str] = []
+        self._created: List[str] = []
+        atexit.register(self._remove_all)
+
+    def acquire(self) -> str:
+        with self._lock:
+            while self._idle:
+                path = self._idle.pop()
+                if os.path.isdir(path): # The OS may have cleaned the temp directory meanwhile
+                    return path
+            # PID in the name, so concurrent app instances never share a directory
+            path = tempfile.mkdtemp(prefix=f"{TEMP_DIR_NAME}_{os.getpid()}_")
+            self._created.append(path)
+            return path
+
+    def release(self, path: str) -> None:
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.unlink(entry.path)
+        except OSError as e:
+            print(f"Warning: Could not empty temp directory {path}: {e}")
+        with self._lock:
+            if len(self._idle) < self.MAX_IDLE:
+                self._idle.append(path)
+                return
+            self._created.remove(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _remove_all(self) -> None:
+        with self._lock:
+            paths, self._created, self._idle = self._created, [], []
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_temp_dir_pool = _TempDirPool()
+# Shared by all workers: parallel cuts queue for the GPU's few encoder sessions instead of overrunning them
+_hw_encode_slots = threading.BoundedSemaphore(HW_ENCODE_MAX_SESSIONS)
+
+
+class _ProberSignals(QObject):
+    probe_ready = pyqtSignal(dict) # {'info': ..., 'duration': ..., 'fps': ...}, once metadata is known
+    keyframes_batch = pyqtSignal(list) # Keyframes found so far (unsorted), emitted while probing
+    keyframes_ready = pyqtSignal(list) # Full sorted list, emitted once probing is done
+    keyframes_incomplete = pyqtSignal(list, str) # Instead of keyframes_ready if a probe failed: partial list, error
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class VideoProberWorker(QRunnable):
+    """
+    ffprobe operations (duration, keyframes, fps) for one file, run on the global QThreadPool so opening
+    files reuses pooled threads. QRunnable can't have signals; they live on a QObject and are exposed
+    under the same names (probe_ready, ..., finished) as on a QThread worker.
+    """
+    def __init__(self, filepath: str, need_fps: bool = True, need_keyframes: bool = True):
+        super().__init__()
+        self.setAutoDelete(False) # Owned by Python (the caller keeps a reference)
+        self._signals = _ProberSignals()
+        self.probe_ready = self._signals.probe_ready
+        self.keyframes_batch = self._signals.keyframes_batch
+        self.keyframes_ready = self._signals.keyframes_ready
+        self.keyframes_incomplete = self._signals.keyframes_incomplete
+        self.error = self._signals.error
+        self.finished = self._signals.finished
+        self._running = False
         self.filepath = filepath
+        # Callers that don't step frames / snap to keyframes can skip that work (keyframes are the costly part)
+        self.need_fps = need_fps
+        self.need_keyframes = need_keyframes
 
     def run(self):
         try:
-            video_info = get_video_info(self.filepath)
+            if self.need_keyframes:
+                # The info probe also lists the first minute's keyframes; short videos need no second ffprobe
+                video_info, head_keyframes = get_video_info_and_keyframes(self.filepath, KEYFRAME_HEAD_PROBE_SEC)
+            else:
+                video_info, head_keyframes = get_video_info(self.filepath), []
             if not video_info:
                 self.error.emit(f"Could not probe video information for: {os.path.basename(self.filepath)}")
                 return
 
-            self.info_ready.emit(video_info)
-
-            duration = get_video_duration(video_info)
+            summary = probe_summary(video_info) # Duration (with stream fallback) and FPS in one pass
+            duration = summary.duration
             if duration <= 0:
-                # Attempt to get duration from streams if format.duration is invalid
-                stream_duration_found = False
-                if video_info and "streams" in video_info:
-                    max_stream_duration = 0.0
-                    for stream in video_info["streams"]:
-                        if "duration" in stream:
-                            try:
-                                stream_dur = float(stream["duration"])
-                                if stream_dur > max_stream_duration:
-                                    max_stream_duration = stream_dur
-                                    stream_duration_found = True
-                            except ValueError:
-                                continue
-                    if stream_duration_found and max_stream_duration > 0:
-                        duration = max_stream_duration
-                    else:
-                        self.error.emit(f"Could not determine video duration or duration is zero for: {os.path.basename(self.filepath)}")
-                        return
-                else: # No streams info to fallback on
-                    self.error.emit(f"Could not determine video duration (no format or stream duration) for: {os.path.basename(self.filepath)}")
-                    return
-            self.duration_ready.emit(duration)
+                self.error.emit(f"Could not determine video duration or duration is zero for: {os.path.basename(self.filepath)}")
+                return
 
-            fps = get_video_fps(video_info)
-            if fps <= 0:
+            fps = summary.fps if self.need_fps else 0.0
+            if fps <= 0 and self.need_fps:
                 print(f"Warning: Could not determine valid FPS for {os.path.basename(self.filepath)}. Frame stepping disabled.")
-                self.fps_ready.emit(0.0) 
-            else:
-                self.fps_ready.emit(fps)
+                fps = 0.0
+            # One queued signal for all metadata; keyframes follow via keyframes_batch/keyframes_ready
+            self.probe_ready.emit({"info": video_info, "duration": duration, "fps": fps})
 
-            keyframes = get_keyframes(self.filepath)
+            if not self.need_keyframes or duration <= KEYFRAME_HEAD_PROBE_SEC:
+                self.keyframes_ready.emit(head_keyframes)
+                return
+            if head_keyframes:
+                self.keyframes_batch.emit(head_keyframes)
+            try:
+                keyframes = get_keyframes_parallel(self.filepath, duration, batch_callback=self.keyframes_batch.emit,
+                                                   start=KEYFRAME_HEAD_PROBE_SEC, known_keyframes=head_keyframes)
+            except KeyframeProbeError as e:
+                print(f"Warning: Keyframe detection incomplete for {os.path.basename(self.filepath)}: {e}")
+                self.keyframes_incomplete.emit(e.keyframes, str(e))
+                return
             self.keyframes_ready.emit(keyframes)
 
         except Exception as e:
@@ -77,6 +167,16 @@ class VideoProberWorker(QThread):
             print(f"Exception in VideoProberWorker for {self.filepath}:")
             traceback.print_exc()
             self.error.emit(f"Error during video probing: {str(e)}")
+        finally:
+            self._running = False
+            self.finished.emit()
+
+    def start(self) -> None:
+        self._running = True
+        QThreadPool.globalInstance().start(self)
+
+    def isRunning(self) -> bool:
+        return self._running
 
 
 class VideoProcessorWorker(QThread):
@@ -86,161 +186,203 @@ class VideoProcessorWorker(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, input_filepath: str, output_tasks: List[Dict[str, Any]], parent: Optional[QObject] = None):
+    # A re-encoding ffmpeg already uses several cores, so fewer of those run side by side than stream copies
+    REENCODE_THREADS_PER_FFMPEG = 4
+    # Stream-copied concat segments cut by one ffmpeg process (one input per segment)
+    CONCAT_CUTS_PER_FFMPEG = 16
+
+    def __init__(self, input_filepath: str, output_tasks: List[Dict[str, Any]], max_parallel: int = 1,
+                 parent: Optional[QObject] = None):
         super().__init__(parent)
         self.input_filepath = input_filepath
         self.output_tasks = output_tasks
+        self.max_parallel = max(1, max_parallel) # Upper bound on concurrent single_cut ffmpeg processes
         self._is_cancelled = False
+        self._cancel_event = threading.Event() # Watched by every FfmpegProcess.run() of this job
+        self._input_ext = os.path.splitext(input_filepath)[1]
+        # ffmpeg processes currently running, so cancel() can stop them instead of waiting for them to finish
+        self._active_processes: Set[FfmpegProcess] = set()
+        self._active_lock = threading.Lock()
+
+    def _run_ffmpeg(self, ffmpeg_process: FfmpegProcess, progress_callback=None) -> bool:
+        """Runs ffmpeg_process while registered as active, so cancel() can stop it."""
+        with self._active_lock:
+            if self._is_cancelled:
+                raise OperationCancelledError("Operation cancelled.")
+            self._active_processes.add(ffmpeg_process)
+        try:
+            ok = ffmpeg_process.run(progress_callback=progress_callback, cancel_event=self._cancel_event)
+        finally:
+            with self._active_lock:
+                self._active_processes.discard(ffmpeg_process)
+        if not ok and self._is_cancelled:
+            raise OperationCancelledError("Operation cancelled.")
+        return ok
+
+    def _run_encode(self, build_command: Callable[[bool], List[str]], output_format_key: str,
+                    total_duration: Optional[float], progress_callback=None) -> Tuple[bool, FfmpegProcess]:
+        """
+        Runs build_command(hw=True) if the format can use a hardware encoder, falling back to (and
+        staying with) software encoding if the hardware encoder fails to initialise; otherwise
+        build_command(hw=False). Returns the result and the FfmpegProcess that produced it.
+        """
+        if hw_format_args(output_format_key) is not None:
+            ffmpeg_process = FfmpegProcess(build_command(True), total_duration=total_duration)
+            with _hw_encode_slots:
+                ok = self._run_ffmpeg(ffmpeg_process, progress_callback)
+            if ok or not is_hw_init_failure(ffmpeg_process.stdout_buffer):
+                return ok, ffmpeg_process # Other errors (input, disk, ...) would fail in software too
+            print(f"Warning: Hardware encoding failed, retrying with software encoding: {ffmpeg_process.get_error_message()}")
+            mark_hw_encoding_failed()
+        ffmpeg_process = FfmpegProcess(build_command(False), total_duration=total_duration)
+        return self._run_ffmpeg(ffmpeg_process, progress_callback), ffmpeg_process
+
+    def _parallel_workers(self) -> int:
+        """How many single_cut tasks to run at once; 1 (serial) if any task is not an independent cut."""
+        if len(self.output_tasks) < 2 or any(t.get("type", "single_cut") != "single_cut" for t in self.output_tasks):
+            return 1
+        workers = self.max_parallel
+        if any(OUTPUT_FORMATS[t["output_format_key"]]["needs_reencode"] for t in self.output_tasks):
+            workers //= self.REENCODE_THREADS_PER_FFMPEG
+        return max(1, min(workers, len(self.output_tasks)))
 
     def run(self):
         total_tasks = len(self.output_tasks)
         temp_concat_dir = None
 
         try:
-            for i, task_info in enumerate(self.output_tasks):
+            serial_tasks = self.output_tasks
+            parallel_workers = self._parallel_workers()
+            if parallel_workers > 1:
+                if not self._run_single_cuts_parallel(parallel_workers):
+                    self.finished.emit("Operation cancelled.")
+                    return
+                serial_tasks = [] # All done already
+
+            for i, task_info in enumerate(serial_tasks):
                 if self._is_cancelled:
                     # self.error.emit("Operation cancelled by user.") # Emitting error can be disruptive if it's a normal cancel
                     self.finished.emit("Operation cancelled.") # Or a specific cancelled signal
                     return
 
                 task_type = task_info.get("type", "single_cut")
+                if task_type == "multi_cut":
+                    self._run_multi_cut(task_info)
+                    continue
+
                 output_path = task_info["output_path"]
+                output_basename = os.path.basename(output_path)
                 output_format_key = task_info["output_format_key"]
                 start_time = task_info.get("start_time")
                 end_time = task_info.get("end_time")
 
                 format_details = OUTPUT_FORMATS[output_format_key]
-                base_ffmpeg_args = format_details["ffmpeg_args"][:] # Use a copy
+                # Looked up once per task rather than at each use below
+                base_ffmpeg_args = format_details["ffmpeg_args"] # Tuple, never mutated
+                needs_reencode = format_details["needs_reencode"]
+                is_gif = format_details["is_gif"]
 
-                current_status_msg = f"Processing segment {i+1} of {total_tasks}: {os.path.basename(output_path)}"
+                current_status_msg = f"Processing segment {i+1} of {total_tasks}: {output_basename}"
                 self.progress_update.emit(0, current_status_msg)
 
-                if task_type == "concat":
+                if task_type == "concat" and task_info.get("concat_mode") == "filter":
+                    self._run_filter_concat(task_info, i, total_tasks)
+                    self.segment_processed.emit(i + 1, total_tasks, output_path)
+
+                elif task_type == "concat":
                     segments_to_concat = task_info["segments"]
                     final_output_path = output_path 
 
-                    # Ensure temp_concat_dir path is robust
-                    # Using a subfolder within the system's temp directory
-                    base_temp_dir = tempfile.gettempdir()
-                    temp_concat_dir_name = f"{TEMP_DIR_NAME}_{os.getpid()}" # Add PID for uniqueness
-                    temp_concat_dir = os.path.join(base_temp_dir, temp_concat_dir_name)
-                    
-                    os.makedirs(temp_concat_dir, exist_ok=True)
-                    
+                    if temp_concat_dir is None: # One scratch directory serves all concat tasks of this run
+                        temp_concat_dir = _temp_dir_pool.acquire()
+
                     temp_files_list_path = os.path.join(temp_concat_dir, "concat_list.txt")
-                    temp_segment_files = []
-
-                    for seg_idx, (seg_start, seg_end) in enumerate(segments_to_concat):
-                        if self._is_cancelled: raise OperationCancelledError("Cancelled during segment cutting for concat.")
-                        
-                        seg_duration = seg_end - seg_start
-                        temp_ext = os.path.splitext(self.input_filepath)[1] if not format_details["needs_reencode"] else format_details["ext"]
-                        # Ensure temp_ext has a leading dot if it's from format_details
-                        if temp_ext and not temp_ext.startswith('.'):
-                            temp_ext = '.' + temp_ext
-                        
-                        temp_segment_path = os.path.join(temp_concat_dir, f"segment_{seg_idx}{temp_ext or '.tmp'}") # Fallback extension
-                        temp_segment_files.append(temp_segment_path)
-
-                        cmd = ["ffmpeg", "-y", "-i", self.input_filepath]
-                        if seg_start is not None: cmd.extend(["-ss", str(seg_start)])
-                        if seg_end is not None: cmd.extend(["-to", str(seg_end)])
-                        
-                        # Make a copy of base_ffmpeg_args to avoid modifying it if it's complex for GIF
-                        current_task_ffmpeg_args = base_ffmpeg_args[:]
-                        cmd.extend(current_task_ffmpeg_args)
-                        cmd.append(temp_segment_path)
-                        
-                        segment_msg = f"Cutting segment {seg_idx+1}/{len(segments_to_concat)} for concatenation..."
-                        
-                        # Calculate progress for this sub-task more accurately
-                        overall_progress_start_for_cutting = int((i / total_tasks) * 100)
-                        progress_span_for_cutting_one_segment = (1.0 / total_tasks) * (1.0 / len(segments_to_concat)) * 50 # 50% for cutting part
-                        
-                        ffmpeg_process = FfmpegProcess(cmd, total_duration=seg_duration if format_details["needs_reencode"] else None)
-                        
-                        def seg_progress_callback(percentage, msg):
-                            task_progress = int(overall_progress_start_for_cutting + \
-                                                (seg_idx * progress_span_for_cutting_one_segment) + \
-                                                (percentage/100.0 * progress_span_for_cutting_one_segment))
-                            self.progress_update.emit(task_progress, f"Task {i+1}, Segment {seg_idx+1}: {msg}")
-
-                        if not ffmpeg_process.run(progress_callback=seg_progress_callback if format_details["needs_reencode"] else None):
-                            raise FfmpegProcessingError(f"Failed to cut segment {seg_idx+1}: {ffmpeg_process.get_error_message()}")
-                    
-                    with open(temp_files_list_path, "w", encoding='utf-8') as f: # Specify encoding
-                        for p in temp_segment_files:
-                             # ffmpeg concat demuxer expects 'file' directives with relative paths if running from that dir
-                             # or absolute paths. Using absolute paths is safer here.
-                             # Need to escape special characters in paths for the concat file list if any.
-                             # For simplicity, assume paths are okay, but this is a known ffmpeg pitfall.
-                             # Let's use absolute paths and ensure they are quoted if they contain spaces.
-                             # However, -safe 0 allows any path. Using relative to a CWD is also an option.
-                             # For now, sticking to simple relative name for simplicity if CWD is set for Popen.
-                             # Let's use absolute path to be safer for the concat list, ffmpeg -f concat should handle it with -safe 0
-                             f.write(f"file '{p.replace(os.sep, '/')}'\n") # Use forward slashes and quote
-                    
+
+                    # Progress mapping computed once and bound as defaults; the callbacks run per ffmpeg progress line
+                    def cut_progress_callback(percentage, msg, base=int((i / total_tasks) * 100),
+                                              scale=0.5 / total_tasks, # 50% for cutting part
+                                              emit=self.progress_update.emit, prefix=f"Task {i+1}: "):
+                        emit(int(base + percentage * scale), prefix + msg)
+
+                    # A stream-copy join of re-encoded segments needs them probed; each one is probed as soon
+                    # as it is cut, so the probes overlap with the remaining cuts instead of following them
+                    probe_segments = task_info.get("concat_mode") == "demuxer_copy" and needs_reencode
+                    segment_probes: Dict[str, concurrent.futures.Future] = {}
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as probe_pool:
+                        def probe_segment(path: str) -> None:
+                            segment_probes[path] = probe_pool.submit(get_video_info, path)
+
+                        temp_segment_files = self._cut_concat_segments(
+                            segments_to_concat, temp_concat_dir, output_format_key, cut_progress_callback,
+                            on_segment_cut=probe_segment if probe_segments else None
+                        )
+                        segment_infos = [segment_probes[p].result() for p in temp_segment_files] if probe_segments else []
+
                     overall_progress_start_for_concat_step = int((i / total_tasks) * 100) + 50 # 50% for concat step
 
-                    concat_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", temp_files_list_path]
-                    
-                    current_task_ffmpeg_args_concat = base_ffmpeg_args[:] # Fresh copy for concat step
-                    if format_details["is_gif"] and not format_details["needs_reencode"]:
-                        gif_args = OUTPUT_FORMATS["GIF (Animated)"]["ffmpeg_args"][:]
-                        concat_cmd.extend(gif_args)
-                    elif not format_details["needs_reencode"]:
+                    # Segments cut with identical settings can be joined as-is instead of being encoded a second time
+                    copy_concat = task_info.get("concat_mode") == "demuxer_copy" and \
+                        (not needs_reencode or self._segments_match(segment_infos))
+                    if copy_concat and not needs_reencode and \
+                            self._input_ext.lower() in CONCAT_PROTOCOL_EXTENSIONS and \
+                            not any("|" in p for p in temp_segment_files):
+                        # Stream-copied MPEG-TS/PS pieces join byte-wise: no list file, no concat demuxer
+                        concat_cmd = ["ffmpeg", "-y", "-i", "concat:" + "|".join(temp_segment_files)]
+                    else:
+                        # Absolute paths with forward slashes, quoted (-safe 0 below allows any path).
+                        # Built in memory and written with a single os.write instead of one write per segment.
+                        list_bytes = "".join([f"file '{p.replace(os.sep, '/')}'\n" for p in temp_segment_files]).encode("utf-8")
+                        fd = os.open(temp_files_list_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o600)
+                        try:
+                            view = memoryview(list_bytes)
+                            while view:
+                                view = view[os.write(fd, view):]
+                        finally:
+                            os.close(fd)
+                        concat_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", temp_files_list_path]
+
+                    if copy_concat:
+                        concat_cmd.extend(["-map", "0", "-c", "copy"])
+                        if "-movflags" in base_ffmpeg_args: # e.g. +faststart for MP4
+                            flags_idx = base_ffmpeg_args.index("-movflags")
+                            concat_cmd.extend(base_ffmpeg_args[flags_idx:flags_idx + 2])
+                    elif is_gif and not needs_reencode:
+                        concat_cmd.extend(_GIF_FFMPEG_ARGS)
+                    elif not needs_reencode:
                          concat_cmd.extend(["-c", "copy"])
                     else: 
-                        concat_cmd.extend(current_task_ffmpeg_args_concat)
+                        concat_cmd.extend(base_ffmpeg_args)
 
                     concat_cmd.append(final_output_path)
 
                     # Rough duration for concat re-encode: sum of segment durations.
-                    concat_reencode_duration = sum(s[1]-s[0] for s in segments_to_concat) if format_details["needs_reencode"] else None
+                    concat_reencode_duration = _total_duration(segments_to_concat) if needs_reencode and not copy_concat else None
 
                     ffmpeg_process_concat = FfmpegProcess(concat_cmd, total_duration=concat_reencode_duration)
 
-                    def concat_progress_callback(percentage, msg):
-                         task_progress = int(overall_progress_start_for_concat_step + (percentage/100.0) * (50.0 / total_tasks))
-                         self.progress_update.emit(task_progress, f"Task {i+1}, Finalizing: {msg}")
+                    def concat_progress_callback(percentage, msg, base=overall_progress_start_for_concat_step,
+                                                 scale=0.5 / total_tasks, emit=self.progress_update.emit,
+                                                 prefix=f"Task {i+1}, Finalizing: "):
+                        emit(int(base + percentage * scale), prefix + msg)
 
-                    if not ffmpeg_process_concat.run(progress_callback=concat_progress_callback if format_details["needs_reencode"] or (format_details["is_gif"] and not format_details["needs_reencode"]) else None):
+                    if not self._run_ffmpeg(ffmpeg_process_concat, concat_progress_callback if concat_reencode_duration is not None else None):
                         raise FfmpegProcessingError(f"Concatenation failed: {ffmpeg_process_concat.get_error_message()}")
 
                     self.segment_processed.emit(i + 1, total_tasks, final_output_path)
 
                 else: # single_cut
-                    cmd = ["ffmpeg", "-y", "-i", self.input_filepath]
-                    if start_time is not None: cmd.extend(["-ss", str(start_time)])
-                    if end_time is not None: cmd.extend(["-to", str(end_time)])
-                    
-                    current_task_ffmpeg_args = base_ffmpeg_args[:]
-                    cmd.extend(current_task_ffmpeg_args)
-                    cmd.append(output_path)
-
-                    segment_duration = None
-                    if start_time is not None and end_time is not None:
-                        segment_duration = end_time - start_time
-                    elif end_time is not None:
-                        segment_duration = end_time
-                    
-                    overall_progress_start_for_segment = int((i / total_tasks) * 100)
-                    progress_span_for_segment = (1.0 / total_tasks) * 100
-
-
-                    ffmpeg_process = FfmpegProcess(cmd, total_duration=segment_duration if format_details["needs_reencode"] else None)
-                    
-                    def single_cut_progress_callback(percentage, msg):
-                        task_progress = int(overall_progress_start_for_segment + (percentage/100.0 * progress_span_for_segment))
-                        self.progress_update.emit(task_progress, f"Task {i+1}/{total_tasks}: {msg}")
-
-                    if not ffmpeg_process.run(progress_callback=single_cut_progress_callback if format_details["needs_reencode"] else None):
-                        raise FfmpegProcessingError(f"Processing failed for {os.path.basename(output_path)}: {ffmpeg_process.get_error_message()}")
+                    def single_cut_progress_callback(percentage, msg, base=int((i / total_tasks) * 100),
+                                                     scale=1.0 / total_tasks, emit=self.progress_update.emit,
+                                                     prefix=f"Task {i+1}/{total_tasks}: "):
+                        emit(int(base + percentage * scale), prefix + msg)
 
+                    self._run_single_cut(task_info, single_cut_progress_callback)
                     self.segment_processed.emit(i + 1, total_tasks, output_path)
 
 
-            if total_tasks == 1 and self.output_tasks[0].get("type", "single_cut") != "concat":
+            if total_tasks == 1 and self.output_tasks[0].get("type") == "multi_cut":
+                self.finished.emit(f"Successfully processed {len(self.output_tasks[0]['outputs'])} segment(s).")
+            elif total_tasks == 1 and self.output_tasks[0].get("type", "single_cut") != "concat":
                 self.finished.emit(self.output_tasks[0]["output_path"])
             elif total_tasks > 0 and self.output_tasks[0].get("type") == "concat":
                  self.finished.emit(self.output_tasks[0]["output_path"])
@@ -257,18 +399,210 @@ class VideoProcessorWorker(QThread):
             traceback.print_exc()
             self.error.emit(f"An unexpected error occurred in processing: {str(e)}")
         finally:
-            if temp_concat_dir and os.path.exists(temp_concat_dir):
-                try:
-                    shutil.rmtree(temp_concat_dir) # Ensure shutil is imported
-                except Exception as e_rm:
-                    print(f"Warning: Could not remove temp directory {temp_concat_dir}: {e_rm}")
+            if temp_concat_dir:
+                _temp_dir_pool.release(temp_concat_dir)
             # Do not reset _is_cancelled here, the thread instance is finishing.
             # It should be reset if the worker instance is reused, but here it's one-shot.
 
+    def _run_filter_concat(self, task_info: Dict[str, Any], task_index: int, total_tasks: int) -> None:
+        """Runs a concat task with concat_mode "filter": one ffmpeg that decodes, joins and encodes the segments."""
+        segments = task_info["segments"]
+        def progress_callback(percentage, msg, base=task_index / total_tasks * 100, scale=1.0 / total_tasks,
+                              emit=self.progress_update.emit, prefix=f"Task {task_index+1}: "):
+            emit(int(base + percentage * scale), prefix + msg)
+
+        ok, ffmpeg_process = self._run_encode(
+            lambda hw: build_concat_filter_command(self.input_filepath, segments, task_info["output_path"],
+                                                   task_info["output_format_key"], task_info.get("has_audio", True), hw),
+            task_info["output_format_key"], _total_duration(segments), progress_callback
+        )
+        if not ok:
+            raise FfmpegProcessingError(f"Concatenation failed: {ffmpeg_process.get_error_message()}")
+
+    def _cut_concat_segments(self, segments: List[Tuple[float, float]], temp_dir: str, output_format_key: str,
+                             progress_callback, on_segment_cut: Optional[Callable[[str], None]] = None) -> List[str]:
+        """
+        Cuts the segments of a concat task into temp_dir, several ffmpeg processes at a time. Stream-copied
+        segments are cut up to CONCAT_CUTS_PER_FFMPEG per process, saving the ffmpeg startup for the rest.
+        on_segment_cut, if given, is called (on a pool thread) with each temp file as soon as it is written.
+        Returns the temp files in segment order; raises FfmpegProcessingError on the first failure.
+        """
+        format_details = OUTPUT_FORMATS[output_format_key]
+        needs_reencode = format_details["needs_reencode"]
+        temp_ext = self._input_ext if not needs_reencode else format_details["ext"]
+        # Ensure temp_ext has a leading dot if it's from format_details
+        if temp_ext and not temp_ext.startswith('.'):
+            temp_ext = '.' + temp_ext
+        temp_ext = temp_ext or '.tmp' # Fallback extension
+        segment_prefix = os.path.join(temp_dir, "segment_")
+        temp_segment_files = [f"{segment_prefix}{seg_idx}{temp_ext}" for seg_idx in range(len(segments))]
+
+        total_segments = len(segments)
+        group_size = 1 if needs_reencode else self.CONCAT_CUTS_PER_FFMPEG
+        groups = [range(g, min(g + group_size, total_segments)) for g in range(0, total_segments, group_size)]
+        segment_progress = [0.0] * total_segments
+        progress_total = 0.0 # Running sum of segment_progress, so a progress update is O(1)
+        progress_lock = threading.Lock()
+        completed = 0
+
+        def cut_group(group: range) -> None:
+            nonlocal completed, progress_total
+            if self._is_cancelled:
+                raise OperationCancelledError("Cancelled during segment cutting for concat.")
+            if len(group) == 1:
+                seg_idx = group[0]
+                seg_start, seg_end = segments[seg_idx]
+
+                def seg_progress_callback(percentage, msg):
+                    nonlocal progress_total
+                    with progress_lock:
+                        progress_total += percentage - segment_progress[seg_idx]
+                        segment_progress[seg_idx] = percentage
+                        overall = progress_total / total_segments
+                    progress_callback(overall, f"Segment {seg_idx+1}: {msg}")
+
+                ok, ffmpeg_process = self._run_encode(
+                    lambda hw: build_cut_command(self.input_filepath, temp_segment_files[seg_idx], seg_start, seg_end,
+                                                 output_format_key, hw),
+                    output_format_key, seg_end - seg_start if needs_reencode else None,
+                    seg_progress_callback if needs_reencode else None
+                )
+            else:
+                cmd = build_multi_input_cut_command(
+                    self.input_filepath, [(temp_segment_files[j], *segments[j]) for j in group], output_format_key
+                )
+                ffmpeg_process = FfmpegProcess(cmd)
+                ok = self._run_ffmpeg(ffmpeg_process)
+            if not ok:
+                label = f"segment {group[0]+1}" if len(group) == 1 else f"segments {group[0]+1}-{group[-1]+1}"
+                raise FfmpegProcessingError(f"Failed to cut {label}: {ffmpeg_process.get_error_message()}")
+            if on_segment_cut is not None:
+                for j in group:
+                    on_segment_cut(temp_segment_files[j])
+            with progress_lock:
+                for j in group:
+                    progress_total += 100.0 - segment_progress[j]
+                    segment_progress[j] = 100.0
+                completed += len(group)
+                done = completed
+                overall = progress_total / total_segments
+            progress_callback(overall, f"Cut segment {done}/{total_segments} for concatenation...")
+
+        workers = self.max_parallel // self.REENCODE_THREADS_PER_FFMPEG if needs_reencode else self.max_parallel
+        workers = max(1, min(workers, len(groups)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(cut_group, group) for group in groups]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return temp_segment_files
+
+    def _run_single_cut(self, task_info: Dict[str, Any], progress_callback) -> str:
+        """Runs one single_cut task. Returns its output path; raises FfmpegProcessingError on failure."""
+        output_path = task_info["output_path"]
+        output_format_key = task_info["output_format_key"]
+        start_time = task_info.get("start_time")
+        end_time = task_info.get("end_time")
+        needs_reencode = OUTPUT_FORMATS[output_format_key]["needs_reencode"]
+
+        segment_duration = None
+        if start_time is not None and end_time is not None:
+            segment_duration = end_time - start_time
+        elif end_time is not None:
+            segment_duration = end_time
+
+        ok, ffmpeg_process = self._run_encode(
+            lambda hw: build_cut_command(self.input_filepath, output_path, start_time, end_time, output_format_key, hw),
+            output_format_key, segment_duration if needs_reencode else None, progress_callback if needs_reencode else None
+        )
+        if not ok:
+            raise FfmpegProcessingError(f"Processing failed for {os.path.basename(output_path)}: {ffmpeg_process.get_error_message()}")
+        return output_path
+
+    def _run_multi_cut(self, task_info: Dict[str, Any]) -> None:
+        """Runs a multi_cut task: all its (stream-copied) outputs from a single ffmpeg pass over the input."""
+        outputs = [(o["output_path"], o["start_time"], o["end_time"]) for o in task_info["outputs"]]
+        total_outputs = len(outputs)
+        self.progress_update.emit(0, f"Cutting {total_outputs} segments in one pass...")
+        cmd = build_multi_cut_command(self.input_filepath, outputs, task_info["output_format_key"])
+        ffmpeg_process = FfmpegProcess(cmd)
+        if not self._run_ffmpeg(ffmpeg_process):
+            raise FfmpegProcessingError(f"Processing failed: {ffmpeg_process.get_error_message()}")
+        for i, (output_path, _, _) in enumerate(outputs):
+            self.segment_processed.emit(i + 1, total_outputs, output_path)
+
+    def _run_single_cuts_parallel(self, workers: int) -> bool:
+        """
+        Runs all (independent) single_cut tasks on a thread pool; each thread just waits on its own
+        ffmpeg process. Returns False if cancelled. The first failure cancels the tasks not yet started
+        and is re-raised.
+        """
+        total_tasks = len(self.output_tasks)
+        task_progress = [0.0] * total_tasks
+        progress_total = 0.0 # Running sum of task_progress, so a progress update is O(1)
+        progress_lock = threading.Lock()
+
+        def run_task(i: int, task_info: Dict[str, Any]) -> Optional[str]:
+            if self._is_cancelled:
+                return None
+            def progress_callback(percentage, msg):
+                nonlocal progress_total
+                with progress_lock:
+                    progress_total += percentage - task_progress[i]
+                    task_progress[i] = percentage
+                    overall = int(progress_total / total_tasks)
+                self.progress_update.emit(overall, f"Task {i+1}/{total_tasks}: {msg}")
+            return self._run_single_cut(task_info, progress_callback)
+
+        self.progress_update.emit(0, f"Processing {total_tasks} segments, {workers} at a time...")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_task, i, t) for i, t in enumerate(self.output_tasks)]
+            try:
+                completed = 0
+                for future in concurrent.futures.as_completed(futures):
+                    output_path = future.result()
+                    if output_path is not None:
+                        completed += 1
+                        self.segment_processed.emit(completed, total_tasks, output_path)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return not self._is_cancelled
+
+    @staticmethod
+    def _segments_match(segment_infos: List[Optional[Dict[str, Any]]]) -> bool:
+        """
+        True if all segments (given as get_video_info results) have the same stream layout and codec
+        parameters, i.e. the concat demuxer can join them with stream copy.
+        """
+        signatures = set()
+        for info in segment_infos:
+            if not info:
+                return False
+            signatures.add(tuple(
+                (s.get("codec_type"), s.get("codec_name"), s.get("profile"), s.get("width"), s.get("height"),
+                 s.get("pix_fmt"), s.get("r_frame_rate"), s.get("sample_rate"), s.get("channels"))
+                for s in info.get("streams", [])
+            ))
+        return len(signatures) <= 1
+
     def cancel(self):
-        self._is_cancelled = True
-        # More advanced: if self.ffmpeg_process_handle: self.ffmpeg_process_handle.terminate()
-        # For now, relies on checks between ffmpeg calls and within FfmpegProcess if it were to support it.
+        """
+        Requests cancellation and sends the running ffmpeg processes SIGTERM without waiting, so the GUI
+        thread never blocks; each run() sees _cancel_event and kills its process if it doesn't exit.
+        """
+        with self._active_lock:
+            self._is_cancelled = True
+            self._cancel_event.set()
+            processes = list(self._active_processes)
+        self.requestInterruption()
+        for ffmpeg_process in processes:
+            ffmpeg_process.terminate()
 
 
 class FfmpegProcessingError(Exception):